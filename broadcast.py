@@ -0,0 +1,387 @@
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from telegram.error import RetryAfter, NetworkError, TelegramError, Forbidden, BadRequest
+from config import BROADCAST_RATE, BROADCAST_CONCURRENCY, BROADCAST_PROGRESS_INTERVAL, BROADCAST_BATCH_SIZE, BROADCAST_CHECKPOINT_EVERY
+from database import async_db
+from registration import registration_buffer
+from handlers.keyboards import HOME_KEYBOARD
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== TOKEN BUCKET ====================
+class TokenBucket:
+    """
+    Global tezlik cheklovchisi (token bucket)
+
+    Telegram bot uchun umumiy limit ~30 xabar/soniya. Har bir yuborishdan
+    oldin acquire() chaqiriladi; RetryAfter kelganda pause() barcha
+    yuboruvchilarni ko'rsatilgan vaqtga to'xtatadi.
+
+    Args:
+        rate: Soniyasiga ruxsat etilgan so'rovlar soni
+        capacity: Bir zumda ishlatish mumkin bo'lgan maksimal tokenlar
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Bitta token olish (kerak bo'lsa kutish)"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Barcha yuborishlarni vaqtincha to'xtatish (RetryAfter)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+# ==================== XATOLIKLARNI TASNIFLASH ====================
+SENT = "sent"
+BLOCKED = "blocked"        # Botni bloklagan / akkaunt o'chirilgan
+NOT_FOUND = "not_found"    # Chat mavjud emas
+FAILED = "failed"          # Boshqa (vaqtinchalik yoki noma'lum) xatolik
+
+# Shu xatoliklardan keyin foydalanuvchi nofaol deb belgilanadi
+DEAD_OUTCOMES = (BLOCKED, NOT_FOUND)
+
+_NOT_FOUND_MARKERS = ("chat not found", "user not found", "peer_id_invalid", "user is deactivated")
+
+
+def classify_bad_request(error: BadRequest) -> str:
+    """BadRequest xabaridan qabul qiluvchi o'lik ekanligini aniqlash"""
+    message = str(error).lower()
+    if any(marker in message for marker in _NOT_FOUND_MARKERS):
+        return NOT_FOUND
+    return FAILED
+
+
+# ==================== BROADCASTER ====================
+class Broadcaster:
+    """
+    Ko'p foydalanuvchiga xabar yuborish mexanizmi
+
+    Bir vaqtda `concurrency` tagacha so'rov yuboriladi, umumiy tezlik
+    TokenBucket bilan cheklanadi, RetryAfter va tarmoq xatolarida
+    qayta urinib ko'riladi.
+
+    `cursor` - shu users.id gacha (o'zi ham) barcha qabul qiluvchilar
+    ishlangan. Javoblar tartibsiz kelgani uchun u faqat uzluksiz qism
+    tugaganda suriladi va har `checkpoint_every` ta yuborishda saqlanadi.
+    Saqlanadigan hisoblagichlar (`committed`) ham faqat cursor gacha
+    bo'lganlarni sanaydi - undan keyingilar restartda qayta yuboriladi
+    va ikki marta sanalmaydi.
+    """
+
+    def __init__(self, bot, rate: float = BROADCAST_RATE,
+                 concurrency: int = BROADCAST_CONCURRENCY, max_retries: int = 3,
+                 checkpoint_every: int = BROADCAST_CHECKPOINT_EVERY):
+        self.bot = bot
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.checkpoint_every = checkpoint_every
+        self.stats = {'sent': 0, 'failed': 0, 'blocked': 0, 'total': 0}
+        self.dead = {BLOCKED: [], NOT_FOUND: []}
+        self.cursor = 0
+        self.committed = {'sent': 0, 'failed': 0}  # cursor gacha bo'lganlar
+        self._pending = deque()   # Navbatga qo'yilgan users.id lar (o'sish tartibida)
+        self._finished = {}       # Tugagan, lekin oldinda tugamagani bor: users.id -> natija
+        self._unsaved = 0         # Oxirgi checkpoint dan beri ishlanganlar
+        self._checkpoint_due = asyncio.Event()
+
+    async def send_one(self, chat_id: int, text: str) -> str:
+        """
+        Bitta foydalanuvchiga yuborish (qayta urinishlar bilan)
+
+        Returns:
+            str: SENT, BLOCKED, NOT_FOUND yoki FAILED
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+
+            try:
+                await self.bot.send_message(
+                    chat_id=chat_id,
+                    text=text,
+                    parse_mode="HTML"
+                )
+                return SENT
+
+            except RetryAfter as e:
+                logger.warning(f"⏳ Flood limit: {e.retry_after} soniya kutiladi")
+                self.bucket.pause(e.retry_after)
+
+            except Forbidden:
+                return BLOCKED
+
+            except BadRequest as e:
+                # BadRequest NetworkError ning vorisi - undan oldin ushlanadi
+                outcome = classify_bad_request(e)
+                if outcome == FAILED:
+                    logger.error(f"Xabar yuborishda xatolik {chat_id}: {e}")
+                return outcome
+
+            except NetworkError as e:
+                # Vaqtinchalik xatolik - biroz kutib qayta urinish
+                logger.warning(f"⚠️ Tarmoq xatosi {chat_id}: {e}")
+                await asyncio.sleep(2 ** attempt)
+
+            except TelegramError as e:
+                logger.error(f"Xabar yuborishda xatolik {chat_id}: {e}")
+                return FAILED
+
+        return FAILED
+
+    def _complete(self, row_id: int, outcome: str):
+        """Qabul qiluvchi ishlandi - uzluksiz qism tugagan bo'lsa cursor ni surish"""
+        self._finished[row_id] = outcome
+        while self._pending and self._pending[0] in self._finished:
+            self.cursor = self._pending.popleft()
+            key = 'sent' if self._finished.pop(self.cursor) == SENT else 'failed'
+            self.committed[key] += 1
+
+        self._unsaved += 1
+        if self._unsaved >= self.checkpoint_every:
+            self._checkpoint_due.set()
+
+    async def _worker(self, queue: asyncio.Queue, text: str):
+        while True:
+            row_id, chat_id = await queue.get()
+            try:
+                outcome = await self.send_one(chat_id, text)
+                if outcome == SENT:
+                    self.stats['sent'] += 1
+                else:
+                    self.stats['failed'] += 1
+                if outcome in DEAD_OUTCOMES:
+                    self.stats['blocked'] += 1
+                    self.dead[outcome].append(chat_id)
+                # Bekor qilingan yuborish ishlangan hisoblanmaydi
+                self._complete(row_id, outcome)
+            finally:
+                queue.task_done()
+
+    async def _prune_dead(self):
+        """Partiyadagi o'lik qabul qiluvchilarni nofaol qilish"""
+        for reason, chat_ids in self.dead.items():
+            if chat_ids:
+                await async_db.deactivate_users(chat_ids, reason)
+                registration_buffer.mark_inactive(chat_ids)
+                chat_ids.clear()
+
+    async def _checkpoint_loop(self, on_checkpoint, closing: asyncio.Event):
+        """
+        Navbatdagi checkpoint larni bittadan yozish
+
+        Bitta task yozgani uchun eski cursor yangisining ustiga tushmaydi.
+        `closing` o'rnatilgach oxirgi holat yoziladi va sikl tugaydi.
+        """
+        while True:
+            await self._checkpoint_due.wait()
+            self._checkpoint_due.clear()
+            self._unsaved = 0
+
+            try:
+                await self._prune_dead()
+                if on_checkpoint:
+                    await on_checkpoint(self.cursor, dict(self.committed))
+            except Exception as e:
+                logger.warning(f"⚠️ Broadcast checkpoint xatosi: {e}")
+
+            if closing.is_set() and not self._checkpoint_due.is_set():
+                return
+
+    async def _report(self, on_progress, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await on_progress(dict(self.stats))
+            except Exception as e:
+                logger.warning(f"⚠️ Progress yangilashda xatolik: {e}")
+
+    async def run(self, batches, text: str, on_progress=None, on_checkpoint=None,
+                  progress_interval: float = BROADCAST_PROGRESS_INTERVAL) -> dict:
+        """
+        Xabarni partiyalab yuborish
+
+        Har `checkpoint_every` ta yuborishda, oxirida va bekor qilinganda
+        `on_checkpoint(cursor, committed)` chaqiriladi - shu joyda holat bazaga
+        saqlanadi. Restartda ko'pi bilan oxirgi checkpoint dan keyingi
+        bir necha qabul qiluvchi qayta ishlanadi.
+
+        Args:
+            batches: [(users.id, chat_id), ...] partiyalarini (users.id
+                o'sish tartibida) qaytaruvchi async iterable
+            text: Xabar matni
+            on_progress: Har `progress_interval` soniyada chaqiriladigan
+                async funksiya (stats dict qabul qiladi)
+            on_checkpoint: Holatni saqlovchi async funksiya
+
+        Returns:
+            dict: {'sent': ..., 'failed': ..., 'blocked': ..., 'total': ...}
+        """
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [
+            asyncio.create_task(self._worker(queue, text))
+            for _ in range(self.concurrency)
+        ]
+        reporter = asyncio.create_task(self._report(on_progress, progress_interval)) if on_progress else None
+        closing = asyncio.Event()
+        checkpointer = asyncio.create_task(self._checkpoint_loop(on_checkpoint, closing))
+
+        try:
+            async for rows in batches:
+                for row_id, chat_id in rows:
+                    self._pending.append(row_id)
+                    await queue.put((row_id, int(chat_id)))
+
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            if reporter:
+                reporter.cancel()
+            await asyncio.gather(*workers, *([reporter] if reporter else []), return_exceptions=True)
+
+            # Oxirgi holat (bekor qilinganda ham) - worker lar to'xtagach
+            closing.set()
+            self._checkpoint_due.set()
+            await checkpointer
+
+        logger.info(f"📤 Broadcast tugadi: {self.stats}")
+        return dict(self.stats)
+
+
+# ==================== BROADCAST VAZIFALARI ====================
+async def run_broadcast_job(bot, job: dict) -> dict:
+    """
+    Bazadagi broadcast vazifasini bajarish (yoki davom ettirish)
+
+    Foydalanuvchilar users.id bo'yicha partiyalab olinadi; har bir necha
+    yuborishda uzluksiz ishlangan oxirgi users.id (cursor) va
+    hisoblagichlar bazaga yoziladi. Restartdan keyin vazifa shu cursor
+    dan davom etadi - qayta yuborilishi mumkin bo'lganlar faqat oxirgi
+    checkpoint dan keyingi bir necha foydalanuvchi.
+    """
+    broadcaster = Broadcaster(bot)
+    broadcaster.cursor = job['cursor']
+    broadcaster.committed.update(sent=job['sent'], failed=job['failed'])
+    broadcaster.stats.update(
+        sent=job['sent'],
+        failed=job['failed'],
+        total=job['total']
+    )
+
+    async def edit_status(text: str, **kwargs):
+        if not job.get('chat_id') or not job.get('message_id'):
+            return
+        await bot.edit_message_text(
+            chat_id=job['chat_id'],
+            message_id=job['message_id'],
+            text=text,
+            **kwargs
+        )
+
+    async def on_progress(stats: dict):
+        await edit_status(
+            f"📤 Xabar yuborilmoqda...\n\n"
+            f"✅ Yuborildi: {stats['sent']} ta\n"
+            f"❌ Yuborilmadi: {stats['failed']} ta\n"
+            f"📈 Jarayon: {stats['sent'] + stats['failed']}/{stats['total']}"
+        )
+
+    async def on_checkpoint(cursor: int, stats: dict):
+        job['cursor'] = cursor
+        await async_db.checkpoint_broadcast_job(job['id'], cursor, stats['sent'], stats['failed'])
+
+    batches = async_db.iter_user_batches(after_id=job['cursor'], batch_size=BROADCAST_BATCH_SIZE)
+    stats = await broadcaster.run(batches, job['message'], on_progress=on_progress, on_checkpoint=on_checkpoint)
+
+    await async_db.checkpoint_broadcast_job(
+        job['id'], job['cursor'], stats['sent'], stats['failed'], status="done"
+    )
+
+    try:
+        await edit_status(
+            f"📊 <b>XABAR YUBORISH NATIJASI</b>\n\n"
+            f"✅ Yuborildi: {stats['sent']} ta\n"
+            f"❌ Yuborilmadi: {stats['failed']} ta\n"
+            f"🚫 Shundan bloklagan: {stats['blocked']} ta\n"
+            f"📈 Jami: {stats['total']} ta",
+            reply_markup=HOME_KEYBOARD,
+            parse_mode="HTML"
+        )
+    except TelegramError as e:
+        logger.warning(f"⚠️ Broadcast natijasini ko'rsatishda xatolik: {e}")
+
+    return stats
+
+
+# ==================== FON VAZIFALARI ====================
+_running = {}  # job_id -> asyncio.Task
+
+
+def _on_broadcast_done(job_id: int, task: asyncio.Task) -> None:
+    _running.pop(job_id, None)
+    if task.cancelled():
+        logger.info(f"⏸ Broadcast #{job_id} to'xtatildi - keyingi ishga tushishda davom etadi")
+    elif task.exception():
+        logger.error(f"❌ Broadcast #{job_id} xatosi: {task.exception()}", exc_info=task.exception())
+
+
+def start_broadcast(bot, job: dict) -> asyncio.Task:
+    """
+    Broadcast vazifasini fonda boshlash
+
+    application.create_task ishlatilmaydi: Application.stop() bunday
+    vazifalar tugashini kutadi va ko'p soatlik broadcast deploy ni
+    to'xtatib qo'yadi. Bu vazifa stop_broadcasts() da bekor qilinadi,
+    bazadagi cursor dan esa resume_broadcasts() davom ettiradi.
+    """
+    task = asyncio.create_task(run_broadcast_job(bot, job), name=f"broadcast-{job['id']}")
+    _running[job['id']] = task
+    task.add_done_callback(functools.partial(_on_broadcast_done, job['id']))
+    return task
+
+
+async def stop_broadcasts() -> None:
+    """Ishlayotgan broadcast larni to'xtatish (post_stop da)"""
+    tasks = list(_running.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def resume_broadcasts(application) -> None:
+    """Bot ishga tushganda tugallanmagan broadcast larni davom ettirish"""
+    jobs = await async_db.get_unfinished_broadcast_jobs()
+
+    for job in jobs:
+        logger.info(f"🔁 Broadcast #{job['id']} davom ettirilmoqda (cursor: {job['cursor']})")
+        start_broadcast(application.bot, job)
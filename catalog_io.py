@@ -0,0 +1,290 @@
+"""
+Katalogni ommaviy import/eksport qilish (JSONL yoki CSV)
+
+    python catalog_io.py import catalog.jsonl [--update] [--batch 1000]
+    python catalog_io.py export catalog.csv [--category serial]
+
+JSONL qatori:
+    {"code": 1, "name": "...", "category": "kino", "description": "...",
+     "file_id": "...", "file_type": "video"}
+    {"code": 2, "name": "...", "category": "serial",
+     "parts": ["<file_id>", {"file_id": "...", "name": "2-qism"}]}
+
+CSV ustunlari: code,name,category,description,file_id,file_type,parts
+(parts - JSONL dagi kabi JSON ro'yxat; qo'lda yozish uchun "|" bilan
+ajratilgan file_id lar ham qabul qilinadi)
+"""
+import argparse
+import csv
+import json
+import logging
+import time
+from typing import Iterator, Tuple
+from config import CATEGORIES, IMPORT_BATCH_SIZE
+from database import db
+
+logger = logging.getLogger(__name__)
+
+CSV_FIELDS = ["code", "name", "category", "description", "file_id", "file_type", "parts"]
+PART_FILE_TYPES = ("video", "document")
+# Qismli kinolar (add_serial, append_movie_parts) "serial" sifatida saqlanadi
+FILE_TYPES = PART_FILE_TYPES + ("serial",)
+MAX_ERRORS = 20  # Hisobotda ko'rsatiladigan xatolar soni
+
+
+class RowError(ValueError):
+    """Import qatori noto'g'ri"""
+
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+# ==================== O'QISH ====================
+def iter_rows(stream, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Fayldan qatorlarni birma-bir o'qish (butun fayl xotiraga yuklanmaydi)
+
+    Yields:
+        tuple: (qator raqami, xom dict) - JSON buzilgan bo'lsa dict o'rniga RowError
+    """
+    if fmt == "csv":
+        for line_no, row in enumerate(csv.DictReader(stream), 2):
+            yield line_no, row
+        return
+
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, RowError(f"JSON xato: {e.msg}")
+
+
+def _parse_parts(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("["):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError as e:
+                raise RowError(f"parts JSON xato: {e.msg}")
+        else:
+            value = [v.strip() for v in value.split("|") if v.strip()]
+    if not isinstance(value, list):
+        raise RowError("parts ro'yxat bo'lishi kerak")
+
+    parts = []
+    for i, part in enumerate(value, 1):
+        if isinstance(part, str):
+            part = {'file_id': part}
+        if not isinstance(part, dict) or not part.get('file_id'):
+            raise RowError(f"{i}-qismda file_id yo'q")
+        file_type = part.get('file_type') or "video"
+        if file_type not in PART_FILE_TYPES:
+            raise RowError(f"{i}-qism: noma'lum file_type '{file_type}'")
+        parts.append({
+            'name': str(part.get('name') or f"{i}-qism")[:100],
+            'file_id': str(part['file_id']).strip(),
+            'file_type': file_type
+        })
+    return parts
+
+
+def validate_row(raw: dict) -> dict:
+    """
+    Xom qatorni tekshirish va normallashtirish
+
+    Raises:
+        RowError: Qator noto'g'ri
+    """
+    if not isinstance(raw, dict):
+        raise RowError("qator obyekt bo'lishi kerak")
+
+    try:
+        code = int(str(raw.get('code', "")).strip())
+    except ValueError:
+        raise RowError(f"kod raqam emas: {raw.get('code')!r}")
+    if code < 1:
+        raise RowError(f"kod musbat bo'lishi kerak: {code}")
+
+    name = str(raw.get('name') or "").strip()
+    if not name or len(name) > 255:
+        raise RowError("nom bo'sh yoki 255 belgidan uzun")
+
+    category = str(raw.get('category') or "").strip().lower()
+    if category not in CATEGORIES:
+        raise RowError(f"noma'lum kategoriya: {category!r}")
+
+    file_type = str(raw.get('file_type') or "video").strip()
+    if file_type not in FILE_TYPES:
+        raise RowError(f"noma'lum file_type: {file_type!r}")
+
+    file_id = str(raw.get('file_id') or "").strip() or None
+    parts = _parse_parts(raw.get('parts'))
+    if not file_id and not parts:
+        raise RowError("file_id yoki parts kerak")
+
+    return {
+        'code': code,
+        'name': name,
+        'category': category,
+        'description': str(raw.get('description') or "").strip(),
+        'file_id': file_id,
+        'file_type': file_type,
+        'parts': parts
+    }
+
+
+# ==================== IMPORT ====================
+def import_stream(stream, fmt: str, update_existing: bool = False,
+                  batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """
+    Oqimdan katalogni import qilish
+
+    Qatorlar tekshiriladi va `batch_size` tadan bitta tranzaksiyada
+    yoziladi. Xato partiya butunlay qaytariladi, qolganlari davom etadi.
+
+    Returns:
+        dict: {'total', 'inserted', 'updated', 'skipped', 'invalid',
+               'failed', 'errors', 'seconds'}
+    """
+    started = time.monotonic()
+    report = {'total': 0, 'inserted': 0, 'updated': 0, 'skipped': 0,
+              'invalid': 0, 'failed': 0, 'errors': []}
+    batch = {}
+
+    def add_error(line_no: int, message: str):
+        report['invalid'] += 1
+        if len(report['errors']) < MAX_ERRORS:
+            report['errors'].append(f"{line_no}-qator: {message}")
+
+    def flush():
+        if not batch:
+            return
+        result = db.import_movies(list(batch.values()), update_existing=update_existing)
+        if result is None:
+            report['failed'] += len(batch)
+        else:
+            for key, value in result.items():
+                report[key] += value
+        batch.clear()
+
+    for line_no, raw in iter_rows(stream, fmt):
+        report['total'] += 1
+        try:
+            if isinstance(raw, RowError):
+                raise raw
+            movie = validate_row(raw)
+        except RowError as e:
+            add_error(line_no, str(e))
+            continue
+
+        if movie['code'] in batch:
+            # Bitta partiyada takroriy kod - oxirgisi olinadi
+            report['skipped'] += 1
+        batch[movie['code']] = movie
+
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    report['seconds'] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"📥 Import: {report['inserted']} yangi, {report['updated']} yangilandi, "
+        f"{report['skipped']} o'tkazildi, {report['invalid']} xato ({report['seconds']} s)"
+    )
+    return report
+
+
+def import_file(path: str, update_existing: bool = False, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        return import_stream(stream, detect_format(path), update_existing, batch_size)
+
+
+# ==================== EKSPORT ====================
+def export_stream(stream, fmt: str, category: str = None, batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """
+    Katalogni oqimga yozish (kod bo'yicha partiyalab)
+
+    Returns:
+        int: Yozilgan kinolar soni
+    """
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+
+    count, after_code = 0, 0
+    while True:
+        movies = db.get_catalog_batch(after_code, batch_size, category)
+        if not movies:
+            break
+
+        for movie in movies:
+            if writer:
+                # Qism nomi va turi saqlanishi uchun JSON (faqat file_id emas)
+                parts = json.dumps(movie['parts'], ensure_ascii=False) if movie['parts'] else ""
+                writer.writerow({**movie, 'parts': parts})
+            else:
+                if not movie['parts']:
+                    del movie['parts']
+                stream.write(json.dumps(movie, ensure_ascii=False) + "\n")
+
+        count += len(movies)
+        after_code = movies[-1]['code']
+
+    logger.info(f"📤 Eksport: {count} ta kino")
+    return count
+
+
+def export_file(path: str, category: str = None, batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    with open(path, "w", encoding="utf-8", newline="") as stream:
+        return export_stream(stream, detect_format(path), category, batch_size)
+
+
+def format_report(report: dict) -> str:
+    """Import hisobotini matnga o'girish"""
+    text = (
+        f"📥 Jami qator: {report['total']}\n"
+        f"✅ Yangi: {report['inserted']}\n"
+        f"♻️ Yangilandi: {report['updated']}\n"
+        f"⏭ O'tkazildi (mavjud): {report['skipped']}\n"
+        f"❌ Xato: {report['invalid']}\n"
+        f"💥 Yozilmadi: {report['failed']}\n"
+        f"⏱ {report['seconds']} soniya"
+    )
+    if report['errors']:
+        text += "\n\n" + "\n".join(report['errors'])
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Katalog import/eksport (JSONL yoki CSV)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Fayldan import")
+    p_import.add_argument("path")
+    p_import.add_argument("--update", action="store_true", help="Mavjud kodlarni yangilash")
+    p_import.add_argument("--batch", type=int, default=IMPORT_BATCH_SIZE)
+
+    p_export = sub.add_parser("export", help="Faylga eksport")
+    p_export.add_argument("path")
+    p_export.add_argument("--category", choices=list(CATEGORIES))
+    p_export.add_argument("--batch", type=int, default=IMPORT_BATCH_SIZE)
+
+    args = parser.parse_args()
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO)
+
+    if args.command == "import":
+        print(format_report(import_file(args.path, args.update, args.batch)))
+    else:
+        print(f"📤 {export_file(args.path, args.category, args.batch)} ta kino yozildi: {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,29 @@
+import asyncio
+import functools
 import logging
-from sqlalchemy import create_engine, Column, Integer, String, Text, JSON, DateTime, BigInteger
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, Column, Integer, String, Text, JSON, DateTime, Date, BigInteger, Boolean, LargeBinary
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import inspect, text, case, func, and_, or_, literal_column, select, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from datetime import datetime
-from config import DATABASE_URL
+from datetime import datetime, timedelta, date
+from config import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, MOVIE_CACHE_SIZE, SEARCH_RESULTS_LIMIT, CATEGORIES
+from untils.cache import LRUCache
+from untils.search import normalize_name, split_terms
 import json
+from collections import namedtuple
 
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Ro'yxatlar uchun yengil qator (description va parts yuklanmaydi)
+MovieRow = namedtuple("MovieRow", ["code", "name", "category", "part_count"])
+
 
 # ==================== MODELLAR ====================
 class Movie(Base):
@@ -19,17 +33,37 @@ class Movie(Base):
     id = Column(Integer, primary_key=True)
     code = Column(Integer, unique=True, nullable=False, index=True)
     name = Column(String(255), nullable=False)
+    search_name = Column(String(255), nullable=True)  # Qidiruv uchun normallashtirilgan nom
     category = Column(String(50), nullable=False, index=True)
     description = Column(Text, nullable=False)
     file_id = Column(String(255), nullable=True)  # Bitta video uchun
     file_type = Column(String(20), default="video")
-    parts = Column(JSON, nullable=True)  # Serial qismlari uchun [{"name": "1-qism", "file_id": "..."}]
+    parts = Column(JSON, nullable=True)  # Eski format (endi movie_parts jadvalida)
+    part_count = Column(Integer, nullable=True)  # Ro'yxatlar uchun qismlar soni
     created_at = Column(DateTime, default=datetime.now)
     
     def __repr__(self):
         return f"<Movie(code={self.code}, name='{self.name}')>"
 
 
+class MoviePart(Base):
+    """Serial qismlari jadvali - (movie_code, idx) bo'yicha indekslangan"""
+    __tablename__ = "movie_parts"
+    __table_args__ = (
+        UniqueConstraint("movie_code", "idx", name="uq_movie_parts_code_idx"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    movie_code = Column(Integer, ForeignKey("movies.code", ondelete="CASCADE"), nullable=False)
+    idx = Column(Integer, nullable=False)  # 1 dan boshlanadi
+    name = Column(String(100), nullable=True)
+    file_id = Column(String(255), nullable=False)
+    file_type = Column(String(20), default="video")
+    
+    def __repr__(self):
+        return f"<MoviePart(code={self.movie_code}, idx={self.idx})>"
+
+
 class User(Base):
     """Foydalanuvchilar jadvali"""
     __tablename__ = "users"
@@ -38,34 +72,241 @@ class User(Base):
     user_id = Column(String(20), unique=True, nullable=False, index=True)
     username = Column(String(255), nullable=True)
     first_name = Column(String(255), nullable=True)
-    joined_at = Column(DateTime, default=datetime.now)
+    joined_at = Column(DateTime, default=datetime.now, index=True)
+    is_active = Column(Boolean, default=True, nullable=False)  # Botni bloklamaganmi
+    blocked_at = Column(DateTime, nullable=True)
+    block_reason = Column(String(20), nullable=True)  # blocked / not_found
     
     def __repr__(self):
         return f"<User(user_id={self.user_id})>"
 
 
+class BroadcastJob(Base):
+    """Xabar yuborish vazifalari (restartdan keyin davom ettirish uchun)"""
+    __tablename__ = "broadcast_jobs"
+    
+    id = Column(Integer, primary_key=True)
+    message = Column(Text, nullable=False)
+    status = Column(String(20), default="running", index=True)  # running / done
+    cursor = Column(Integer, default=0)  # Oxirgi ishlangan users.id
+    sent = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+    chat_id = Column(BigInteger, nullable=True)  # Holat xabari qayerda
+    message_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<BroadcastJob(id={self.id}, status='{self.status}')>"
+
+
+class DailyStats(Base):
+    """Kunlik statistika (rollup) jadvali"""
+    __tablename__ = "daily_stats"
+    
+    day = Column(Date, primary_key=True)
+    new_users = Column(Integer, default=0)
+    active_users = Column(Integer, default=0)
+    searches = Column(Integer, default=0)
+    part_plays = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<DailyStats(day={self.day})>"
+
+
+class DailyActivity(Base):
+    """Kunlik faol foydalanuvchilar - har bir worker alohida (shard lar kesishmaydi)"""
+    __tablename__ = "daily_activity"
+    
+    day = Column(Date, primary_key=True)
+    worker = Column(Integer, primary_key=True, default=0)
+    active_users = Column(Integer, default=0)
+    
+    def __repr__(self):
+        return f"<DailyActivity(day={self.day}, worker={self.worker})>"
+
+
+class TelegramFile(Base):
+    """Telegram fayllari haqida ma'lumot (file_id tekshiruvi natijalari)"""
+    __tablename__ = "telegram_files"
+    
+    file_id = Column(String(255), primary_key=True)
+    kind = Column(String(20), nullable=True)  # file_id dan aniqlangan tur (video, document, ...)
+    file_size = Column(BigInteger, nullable=True)
+    duration = Column(Integer, nullable=True)
+    mime_type = Column(String(100), nullable=True)
+    status = Column(String(10), default="ok", index=True)  # ok / dead
+    error = Column(String(255), nullable=True)
+    checked_at = Column(DateTime, default=datetime.now)
+    
+    def __repr__(self):
+        return f"<TelegramFile(kind='{self.kind}', status='{self.status}')>"
+
+
+class BotState(Base):
+    """Bot holati (user_data, chat_data, suhbatlar) - PTB persistence uchun"""
+    __tablename__ = "bot_state"
+    
+    kind = Column(String(20), primary_key=True)  # user / chat / bot / conversation
+    key = Column(String(128), primary_key=True)  # user_id, chat_id yoki "suhbat:kalit"
+    data = Column(LargeBinary, nullable=False)  # Siqilgan JSON
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<BotState(kind='{self.kind}', key='{self.key}')>"
+
+
+class SyncVersion(Base):
+    """Keshlar versiyasi - bir nechta jarayon (worker) keshlarini moslash uchun"""
+    __tablename__ = "sync_versions"
+    
+    name = Column(String(20), primary_key=True)  # catalog / files / users
+    version = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<SyncVersion(name='{self.name}', version={self.version})>"
+
+
+# Versiya nomlari: katalog (kinolar, qismlar), fayllar va foydalanuvchilar holati
+SYNC_CATALOG = "catalog"
+SYNC_FILES = "files"
+SYNC_USERS = "users"
+
+
 # ==================== DATABASE MANAGER ====================
 class Database:
     def __init__(self, database_url: str):
+        pool_args = {}
+        if make_url(database_url).get_backend_name() != "sqlite":
+            # SQLite (testlar) pool_size/max_overflow ni qabul qilmaydi
+            pool_args = {'pool_size': DB_POOL_SIZE, 'max_overflow': DB_MAX_OVERFLOW}
+        
         self.engine = create_engine(
             database_url,
             echo=False,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True
+            pool_pre_ping=True,
+            **pool_args
         )
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.movie_cache = LRUCache(maxsize=MOVIE_CACHE_SIZE)
+        self.count_cache = LRUCache(maxsize=len(CATEGORIES) + 1)  # category -> kinolar soni
+        self.overview_cache = LRUCache(maxsize=4)  # top_n -> katalog sharhi
+        self.is_postgres = self.engine.dialect.name == "postgresql"
+        self.has_trgm = False
         self.create_tables()
     
     def create_tables(self):
         """Jadvallarni yaratish"""
         try:
             Base.metadata.create_all(bind=self.engine)
+            self.migrate()
             logger.info("✅ Database jadvallar tayyorlandi")
         except Exception as e:
             logger.error(f"❌ Database xatosi: {e}")
             raise
     
+    # ==================== MIGRATSIYALAR ====================
+    
+    def migrate(self):
+        """Mavjud jadvallarga yangi ustun va indekslarni qo'shish"""
+        self._add_column("movies", "search_name", "VARCHAR(255)")
+        self._add_column("movies", "part_count", "INTEGER")
+        self._add_column("users", "is_active", "BOOLEAN NOT NULL DEFAULT TRUE")
+        self._add_column("users", "blocked_at", "TIMESTAMP")
+        self._add_column("users", "block_reason", "VARCHAR(20)")
+        self._backfill_search_names()
+        self._backfill_part_counts()
+        self._migrate_parts_to_table()
+        self._create_search_index()
+        self._create_index("ix_users_joined_at", "users", "joined_at")
+    
+    def _add_column(self, table: str, column: str, ddl: str) -> bool:
+        """Ustun yo'q bo'lsa qo'shish (create_all mavjud jadvalni o'zgartirmaydi)"""
+        columns = {c['name'] for c in inspect(self.engine).get_columns(table)}
+        if column in columns:
+            return False
+        
+        with self.engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        
+        logger.info(f"✅ Ustun qo'shildi: {table}.{column}")
+        return True
+    
+    def _create_index(self, name: str, table: str, columns: str):
+        """Mavjud jadval uchun indeks yaratish (bo'lmasa)"""
+        with self.engine.begin() as conn:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+    
+    def _backfill_search_names(self):
+        """search_name bo'sh bo'lgan kinolarni to'ldirish"""
+        session = self.get_session()
+        try:
+            movies = session.query(Movie.id, Movie.name).filter(Movie.search_name.is_(None)).all()
+            if movies:
+                session.bulk_update_mappings(Movie, [
+                    {'id': movie_id, 'search_name': normalize_name(name)}
+                    for movie_id, name in movies
+                ])
+                session.commit()
+                logger.info(f"✅ {len(movies)} ta kino uchun search_name to'ldirildi")
+        finally:
+            session.close()
+    
+    def _backfill_part_counts(self):
+        """part_count bo'sh bo'lgan kinolarni parts ustunidan to'ldirish"""
+        session = self.get_session()
+        try:
+            movies = session.query(Movie.id, Movie.parts).filter(Movie.part_count.is_(None)).all()
+            if movies:
+                session.bulk_update_mappings(Movie, [
+                    {'id': movie_id, 'part_count': len(parts) if parts else 1}
+                    for movie_id, parts in movies
+                ])
+                session.commit()
+                logger.info(f"✅ {len(movies)} ta kino uchun part_count to'ldirildi")
+        finally:
+            session.close()
+    
+    def _migrate_parts_to_table(self):
+        """Movie.parts JSON dagi qismlarni movie_parts jadvaliga ko'chirish"""
+        session = self.get_session()
+        try:
+            migrated = session.query(MoviePart.movie_code).distinct()
+            movies = session.query(Movie.code, Movie.parts).filter(
+                Movie.parts.isnot(None),
+                Movie.code.notin_(migrated)
+            ).all()
+            
+            rows = []
+            for code, parts in movies:
+                rows.extend(self._part_rows(code, parts or []))
+            
+            if rows:
+                session.bulk_insert_mappings(MoviePart, rows)
+                session.commit()
+                logger.info(f"✅ {len(movies)} ta serial qismlari movie_parts ga ko'chirildi")
+        finally:
+            session.close()
+    
+    def _create_search_index(self):
+        """Nom bo'yicha qidiruv indeksi (Postgres da trigram, boshqalarda B-tree)"""
+        if self.is_postgres:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                    conn.execute(text(
+                        "CREATE INDEX IF NOT EXISTS ix_movies_search_name_trgm "
+                        "ON movies USING gin (search_name gin_trgm_ops)"
+                    ))
+                self.has_trgm = True
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ pg_trgm mavjud emas, oddiy indeks ishlatiladi: {e}")
+        
+        self._create_index("ix_movies_search_name", "movies", "search_name")
+    
     def get_session(self) -> Session:
         return self.SessionLocal()
     
@@ -80,17 +321,22 @@ class Database:
             movie = Movie(
                 code=code,
                 name=name,
+                search_name=normalize_name(name),
                 category=category,
                 description=description,
                 file_id=file_id,
                 file_type=file_type,
-                parts=parts
+                part_count=len(parts) if parts else 1
             )
             
             session.add(movie)
+            if parts:
+                session.flush()
+                session.bulk_insert_mappings(MoviePart, self._part_rows(code, parts))
             session.commit()
             session.close()
             
+            self._invalidate_catalog(code)
             logger.info(f"✅ Kino qo'shildi: {name} (Kod: {code})")
             return True
             
@@ -110,62 +356,246 @@ class Database:
         )
     
     def get_movie_by_code(self, code: int) -> dict:
-        """Kod bo'yicha kino olish"""
+        """Kod bo'yicha kino olish (avval keshdan)"""
+        cached = self.movie_cache.get(code)
+        if cached is not None:
+            return cached
+        
+        # O'qish davomida o'chirilsa/yangilansa eski nusxa keshga yozilmaydi
+        generation = self.movie_cache.generation(code)
+        
         try:
             session = self.get_session()
             movie = session.query(Movie).filter_by(code=code).first()
             session.close()
             
             if movie:
-                return self._movie_to_dict(movie)
+                result = self._movie_to_dict(movie)
+                self.movie_cache.set(code, result, generation)
+                return result
             return None
             
         except Exception as e:
             logger.error(f"❌ Kino qidirish xatosi: {e}")
             return None
     
-    def get_movies_by_category(self, category: str) -> list:
-        """Kategoriya bo'yicha kinolarni olish"""
+    def count_movies(self, category: str = None) -> int:
+        """Kinolar soni (kategoriya bo'yicha yoki hammasi), keshlanadi"""
+        cached = self.count_cache.get(category)
+        if cached is not None:
+            return cached
+        
+        generation = self.count_cache.generation(category)
+        
         try:
             session = self.get_session()
-            movies = session.query(Movie).filter_by(category=category).order_by(Movie.code).all()
+            query = session.query(func.count(Movie.id))
+            
+            if category:
+                query = query.filter(Movie.category == category)
+            
+            count = query.scalar()
             session.close()
             
-            return [self._movie_to_dict(m) for m in movies]
+            self.count_cache.set(category, count, generation)
+            return count
             
         except Exception as e:
-            logger.error(f"❌ Kategoriya bo'yicha kinolar xatosi: {e}")
-            return []
+            logger.error(f"❌ Kinolar soni xatosi: {e}")
+            return 0
     
-    def search_movies_by_name(self, name: str, category: str = None) -> list:
-        """Nom bo'yicha kino qidirish"""
+    def get_movies_page(self, category: str = None, page: int = 1, per_page: int = 20) -> list:
+        """
+        Bitta sahifadagi kinolar (LIMIT/OFFSET), MovieRow lar
+        
+        Args:
+            category: Kategoriya (None - barcha kinolar)
+            page: Sahifa raqami (1-based)
+            per_page: Sahifadagi kinolar soni
+        """
         try:
             session = self.get_session()
-            query = session.query(Movie).filter(Movie.name.ilike(f'%{name}%'))
+            query = session.query(*self._row_columns())
             
             if category:
-                query = query.filter_by(category=category)
+                query = query.filter(Movie.category == category).order_by(Movie.code)
+            else:
+                query = query.order_by(Movie.category, Movie.code)
             
-            movies = query.order_by(Movie.code).all()
+            movies = query.offset((page - 1) * per_page).limit(per_page).all()
             session.close()
             
-            return [self._movie_to_dict(m) for m in movies]
+            return [MovieRow(*m) for m in movies]
             
         except Exception as e:
-            logger.error(f"❌ Kino qidirish xatosi: {e}")
+            logger.error(f"❌ Kinolar sahifasi xatosi: {e}")
             return []
     
-    def get_all_movies(self) -> list:
-        """Barcha kinolarni olish"""
+    def get_catalog_overview(self, top_n: int = 5) -> dict:
+        """
+        Katalog sharhi: har bir kategoriya uchun soni va birinchi top_n ta kino
+        
+        Bitta so'rov: row_number() va count() window funksiyalari kategoriya
+        bo'yicha hisoblanadi, faqat rn <= top_n qatorlar qaytadi. Natija
+        katalog o'zgarguncha keshlanadi.
+        
+        Returns:
+            dict: {
+                'total': jami kinolar,
+                'categories': {category: {'count': ..., 'movies': [...]}}
+            }
+        """
+        cached = self.overview_cache.get(top_n)
+        if cached is not None:
+            return cached
+        
+        generation = self.overview_cache.generation(top_n)
+        
         try:
             session = self.get_session()
-            movies = session.query(Movie).order_by(Movie.category, Movie.code).all()
+            
+            ranked = session.query(
+                Movie.code,
+                Movie.name,
+                Movie.category,
+                Movie.part_count,
+                func.row_number().over(partition_by=Movie.category, order_by=Movie.code).label('rn'),
+                func.count(Movie.id).over(partition_by=Movie.category).label('cnt')
+            ).subquery()
+            
+            rows = session.query(ranked).filter(
+                ranked.c.rn <= top_n
+            ).order_by(ranked.c.category, ranked.c.code).all()
             session.close()
             
-            return [self._movie_to_dict(m) for m in movies]
+            overview = {'total': 0, 'categories': {}}
+            for row in rows:
+                cat = overview['categories'].setdefault(row.category, {'count': row.cnt, 'movies': []})
+                cat['movies'].append(MovieRow(row.code, row.name, row.category, row.part_count or 1))
+            overview['total'] = sum(c['count'] for c in overview['categories'].values())
+            
+            self.overview_cache.set(top_n, overview, generation)
+            return overview
             
         except Exception as e:
-            logger.error(f"❌ Barcha kinolar xatosi: {e}")
+            logger.error(f"❌ Katalog sharhi xatosi: {e}")
+            return {'total': 0, 'categories': {}}
+    
+    def append_movie_parts(self, code: int, parts: list) -> int:
+        """
+        Mavjud serialga yangi qismlar qo'shish (eski qismlar o'zgarmaydi)
+        
+        Bitta kichik tranzaksiya: kino qatori bloklanadi, oxirgi idx dan
+        keyin yangi qatorlar yoziladi va part_count yangilanadi.
+        
+        Returns:
+            int: Yangi qismlar soni (kino topilmasa yoki xatolikda None)
+        """
+        try:
+            session = self.get_session()
+            movie = session.query(Movie).filter_by(code=code).with_for_update().first()
+            
+            if not movie:
+                session.close()
+                return None
+            
+            last_idx = session.query(func.max(MoviePart.idx)).filter_by(movie_code=code).scalar() or 0
+            
+            # Bitta videoli kino - mavjud video 1-qism bo'ladi
+            if last_idx == 0 and movie.file_id:
+                parts = [{'file_id': movie.file_id, 'file_type': movie.file_type}] + list(parts)
+            
+            session.bulk_insert_mappings(MoviePart, self._part_rows(code, parts, start=last_idx + 1))
+            movie.part_count = last_idx + len(parts)
+            movie.file_type = "serial"
+            part_count = movie.part_count
+            
+            session.commit()
+            session.close()
+            
+            # Faqat shu kod va qismlar soni ko'rinadigan sharh
+            self.movie_cache.invalidate(code)
+            self.overview_cache.clear()
+            self.bump_version(SYNC_CATALOG)
+            
+            logger.info(f"✅ {code} ga qismlar qo'shildi (jami: {part_count})")
+            return part_count
+            
+        except Exception as e:
+            logger.error(f"❌ Qism qo'shish xatosi ({code}): {e}")
+            return None
+    
+    def get_movie_part(self, code: int, idx: int) -> dict:
+        """
+        Serialning bitta qismini olish - (movie_code, idx) indeksi bo'yicha
+        
+        Args:
+            code: Kino kodi
+            idx: Qism raqami (1 dan boshlanadi)
+        """
+        try:
+            session = self.get_session()
+            part = session.query(MoviePart).filter_by(movie_code=code, idx=idx).first()
+            session.close()
+            
+            if part:
+                return {
+                    'idx': part.idx,
+                    'name': part.name or f"{part.idx}-qism",
+                    'file_id': part.file_id,
+                    'file_type': part.file_type
+                }
+            return None
+            
+        except Exception as e:
+            logger.error(f"❌ Qism olish xatosi ({code}/{idx}): {e}")
+            return None
+    
+    def search_movies_by_name(self, name: str, category: str = None,
+                              limit: int = SEARCH_RESULTS_LIMIT) -> list:
+        """
+        Nom bo'yicha kino qidirish (relevantlik bo'yicha saralangan, MovieRow lar)
+        
+        Nom va so'rov normallashtiriladi (kirill/lotin, apostroflar), so'ng
+        har bir so'z search_name ichida qidiriladi. Natijalar: aniq mos,
+        shu so'z bilan boshlanadigan, qolganlari - o'xshashlik bo'yicha.
+        """
+        term = normalize_name(name)
+        terms = split_terms(name)
+        if not terms:
+            return []
+        
+        try:
+            session = self.get_session()
+            
+            match = and_(*[Movie.search_name.contains(t, autoescape=True) for t in terms])
+            if self.has_trgm:
+                # % operatori trigram o'xshashlik (xato yozilgan nomlar uchun)
+                match = match | Movie.search_name.op('%')(term)
+            
+            query = session.query(*self._row_columns()).filter(match)
+            
+            if category:
+                query = query.filter_by(category=category)
+            
+            rank = case(
+                (Movie.search_name == term, 0),
+                (Movie.search_name.startswith(term, autoescape=True), 1),
+                else_=2
+            )
+            
+            if self.has_trgm:
+                order = [rank, func.similarity(Movie.search_name, term).desc(), Movie.code]
+            else:
+                order = [rank, func.length(Movie.search_name), Movie.code]
+            
+            movies = query.order_by(*order).limit(limit).all()
+            session.close()
+            
+            return [MovieRow(*m) for m in movies]
+            
+        except Exception as e:
+            logger.error(f"❌ Kino qidirish xatosi: {e}")
             return []
     
     def delete_movie(self, code: int) -> bool:
@@ -175,9 +605,11 @@ class Database:
             movie = session.query(Movie).filter_by(code=code).first()
             
             if movie:
+                session.query(MoviePart).filter_by(movie_code=code).delete(synchronize_session=False)
                 session.delete(movie)
                 session.commit()
                 session.close()
+                self._invalidate_catalog(code)
                 logger.info(f"✅ Kino o'chirildi: {code}")
                 return True
             
@@ -192,7 +624,6 @@ class Database:
         """Kategoriyalar bo'yicha kino soni"""
         try:
             session = self.get_session()
-            from sqlalchemy import func
             
             result = session.query(
                 Movie.category, 
@@ -210,33 +641,152 @@ class Database:
     # ==================== FOYDALANUVCHI OPERATIONS ====================
     
     def add_user(self, user_id: str, username: str = None, first_name: str = None) -> bool:
-        """Yangi foydalanuvchi qo'shish"""
+        """
+        Foydalanuvchini qo'shish yoki yangilash (upsert)
+        
+        Postgres da bitta INSERT ... ON CONFLICT so'rovi: yangi bo'lsa qo'shadi,
+        mavjud bo'lsa username/first_name o'zgargandagina yangilaydi.
+        
+        Returns:
+            bool: Foydalanuvchi yangi bo'lsa True
+        """
         try:
-            session = self.get_session()
+            if self.is_postgres:
+                is_new = self._upsert_user_postgres(user_id, username, first_name)
+            else:
+                is_new = self._upsert_user_generic(user_id, username, first_name)
             
-            # Mavjudligini tekshirish
+            if is_new:
+                logger.info(f"✅ Foydalanuvchi qo'shildi: {first_name} ({user_id})")
+            return is_new
+            
+        except Exception as e:
+            logger.error(f"❌ Foydalanuvchi qo'shish xatosi: {e}")
+            return False
+    
+    def _upsert_user_postgres(self, user_id: str, username: str, first_name: str) -> bool:
+        """INSERT ... ON CONFLICT DO UPDATE ... RETURNING (xmax = 0)"""
+        users = User.__table__
+        stmt = pg_insert(users).values(
+            user_id=user_id,
+            username=username,
+            first_name=first_name,
+            joined_at=datetime.now(),
+            is_active=True
+        )
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[users.c.user_id],
+            set_={
+                'username': excluded.username,
+                'first_name': excluded.first_name,
+                'is_active': True,
+                'blocked_at': None,
+                'block_reason': None
+            },
+            # O'zgarish bo'lmasa yozilmaydi va hech narsa qaytmaydi
+            where=or_(
+                users.c.username.is_distinct_from(excluded.username),
+                users.c.first_name.is_distinct_from(excluded.first_name),
+                users.c.is_active.is_(False)
+            )
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        
+        with self.engine.begin() as conn:
+            row = conn.execute(stmt).first()
+        
+        # xmax = 0 - qator shu tranzaksiyada yaratilgan (UPDATE emas)
+        return bool(row and row.inserted)
+    
+    def _upsert_user_generic(self, user_id: str, username: str, first_name: str) -> bool:
+        """ON CONFLICT qo'llab-quvvatlanmaydigan bazalar uchun (masalan, testlarda SQLite)"""
+        session = self.get_session()
+        try:
             existing = session.query(User).filter_by(user_id=user_id).first()
             
             if existing:
-                session.close()
+                if (existing.username, existing.first_name, existing.is_active) != (username, first_name, True):
+                    existing.username = username
+                    existing.first_name = first_name
+                    # Botni qayta ishga tushirgan bo'lsa - yana faol
+                    existing.is_active = True
+                    existing.blocked_at = None
+                    existing.block_reason = None
+                    session.commit()
                 return False
             
-            user = User(
-                user_id=user_id,
-                username=username,
-                first_name=first_name
-            )
-            
-            session.add(user)
-            session.commit()
+            session.add(User(user_id=user_id, username=username, first_name=first_name))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Parallel /start allaqachon qo'shib ulgurgan
+                session.rollback()
+                return False
+            return True
+        finally:
             session.close()
+    
+    def add_users_bulk(self, users: list) -> int:
+        """
+        Bir nechta foydalanuvchini bitta tranzaksiyada qo'shish
+        
+        Args:
+            users: [{'user_id', 'username', 'first_name', 'joined_at'}, ...]
+                (user_id lar takrorlanmasligi kerak)
+        
+        Returns:
+            int: Yozilgan qatorlar soni
+        """
+        if not users:
+            return 0
+        
+        try:
+            if self.is_postgres:
+                users_table = User.__table__
+                stmt = pg_insert(users_table).values([
+                    {**u, 'is_active': True} for u in users
+                ])
+                excluded = stmt.excluded
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[users_table.c.user_id],
+                    set_={
+                        'username': excluded.username,
+                        'first_name': excluded.first_name,
+                        'is_active': True,
+                        'blocked_at': None,
+                        'block_reason': None
+                    }
+                )
+                with self.engine.begin() as conn:
+                    conn.execute(stmt)
+            else:
+                for u in users:
+                    self._upsert_user_generic(u['user_id'], u['username'], u['first_name'])
             
-            logger.info(f"✅ Foydalanuvchi qo'shildi: {first_name} ({user_id})")
-            return True
+            logger.info(f"✅ {len(users)} ta foydalanuvchi yozildi")
+            return len(users)
             
         except Exception as e:
-            logger.error(f"❌ Foydalanuvchi qo'shish xatosi: {e}")
-            return False
+            logger.error(f"❌ Foydalanuvchilarni ommaviy qo'shish xatosi: {e}")
+            return 0
+    
+    def get_user_state_batch(self, after_id: int = 0, limit: int = 5000) -> list:
+        """
+        Foydalanuvchilar holatini keyset sahifalash bilan olish
+        
+        Returns:
+            list: [(id, user_id, is_active, username, first_name), ...]
+        """
+        try:
+            session = self.get_session()
+            rows = session.query(User.id, User.user_id, User.is_active, User.username, User.first_name).filter(
+                User.id > after_id
+            ).order_by(User.id).limit(limit).all()
+            session.close()
+            return [tuple(row) for row in rows]
+        except Exception as e:
+            logger.error(f"❌ Foydalanuvchilar holati xatosi: {e}")
+            return []
     
     def get_all_users(self) -> list:
         """Barcha foydalanuvchilarni olish"""
@@ -251,17 +801,212 @@ class Database:
             logger.error(f"❌ Barcha foydalanuvchilar xatosi: {e}")
             return []
     
-    def get_user_count(self) -> int:
+    def get_user_id_batch(self, after_id: int = 0, limit: int = 1000, active_only: bool = True) -> list:
+        """
+        Foydalanuvchi ID larini keyset sahifalash bilan olish
+        
+        Returns:
+            list: [(id, user_id), ...] - id bo'yicha o'sish tartibida
+        """
+        try:
+            session = self.get_session()
+            query = session.query(User.id, User.user_id).filter(User.id > after_id)
+            
+            if active_only:
+                query = query.filter(User.is_active.is_(True))
+            
+            rows = query.order_by(User.id).limit(limit).all()
+            session.close()
+            return [(row.id, row.user_id) for row in rows]
+        except Exception as e:
+            logger.error(f"❌ Foydalanuvchi ID lari xatosi: {e}")
+            return []
+    
+    def get_user_count(self, active_only: bool = False) -> int:
         """Foydalanuvchilar soni"""
         try:
             session = self.get_session()
-            count = session.query(User).count()
+            query = session.query(func.count(User.id))
+            
+            if active_only:
+                query = query.filter(User.is_active.is_(True))
+            
+            count = query.scalar()
             session.close()
             return count
         except Exception as e:
             logger.error(f"❌ Foydalanuvchilar soni xatosi: {e}")
             return 0
     
+    def deactivate_users(self, user_ids: list, reason: str) -> int:
+        """Botni bloklagan yoki o'chirilgan foydalanuvchilarni nofaol qilish"""
+        if not user_ids:
+            return 0
+        
+        try:
+            session = self.get_session()
+            count = session.query(User).filter(
+                User.user_id.in_([str(u) for u in user_ids])
+            ).update({
+                'is_active': False,
+                'blocked_at': datetime.now(),
+                'block_reason': reason
+            }, synchronize_session=False)
+            session.commit()
+            session.close()
+            
+            if count:
+                self.bump_version(SYNC_USERS)
+            logger.info(f"🚫 {count} ta foydalanuvchi nofaol qilindi ({reason})")
+            return count
+            
+        except Exception as e:
+            logger.error(f"❌ Foydalanuvchilarni nofaol qilish xatosi: {e}")
+            return 0
+    
+    def get_deactivated_user_ids(self, since: datetime) -> list:
+        """`since` dan keyin nofaol qilingan (va hali nofaol) foydalanuvchilar"""
+        try:
+            session = self.get_session()
+            rows = session.query(User.user_id).filter(
+                User.is_active.is_(False),
+                User.blocked_at >= since
+            ).all()
+            session.close()
+            return [user_id for user_id, in rows]
+        except Exception as e:
+            logger.error(f"❌ Nofaol foydalanuvchilarni olish xatosi: {e}")
+            return []
+    
+    def get_user_growth(self) -> dict:
+        """
+        Oxirgi soat, kun va haftadagi yangi foydalanuvchilar
+        
+        Bitta so'rov: joined_at indeksi bo'yicha oxirgi hafta oralig'i
+        olinadi, ichida shartli COUNT lar hisoblanadi.
+        """
+        now = datetime.now()
+        hour_ago = now - timedelta(hours=1)
+        day_ago = now - timedelta(days=1)
+        week_ago = now - timedelta(weeks=1)
+        
+        try:
+            session = self.get_session()
+            row = session.query(
+                func.count(case((User.joined_at >= hour_ago, 1))),
+                func.count(case((User.joined_at >= day_ago, 1))),
+                func.count(User.id)
+            ).filter(User.joined_at >= week_ago).one()
+            session.close()
+            
+            return {'hour': row[0], 'day': row[1], 'week': row[2]}
+            
+        except Exception as e:
+            logger.error(f"❌ Foydalanuvchilar o'sishi xatosi: {e}")
+            return {'hour': 0, 'day': 0, 'week': 0}
+    
+    def get_stats(self) -> dict:
+        """Bot statistikasi - faqat COUNT/GROUP BY so'rovlari"""
+        movies_by_category = self.get_movie_count_by_category()
+        
+        return {
+            'users_total': self.get_user_count(),
+            'users_active': self.get_user_count(active_only=True),
+            'new_users': self.get_user_growth(),
+            'movies_total': sum(movies_by_category.values()),
+            'movies_by_category': movies_by_category,
+            'files': self.get_file_status_counts(),
+            'cache': self.get_cache_stats()
+        }
+    
+    # ==================== KUNLIK STATISTIKA ====================
+    
+    def rollup_daily_stats(self, day: date, searches: int = 0, part_plays: int = 0,
+                           active_users: int = 0, worker: int = 0) -> bool:
+        """
+        Bir kunlik statistikani yangilash (inkremental)
+        
+        searches/part_plays - oxirgi rollup dan beri qo'shilganlar (delta),
+        bazada qo'shiladi (bir nechta worker bir qatorni yangilaydi).
+        active_users - shu worker dagi noyob foydalanuvchilar (kattasi
+        saqlanadi); foydalanuvchilar worker larga ID bo'yicha bo'lingani
+        uchun kunlik jami - worker lar yig'indisi.
+        new_users - joined_at indeksi bo'yicha shu kun oralig'idan sanaladi.
+        """
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+        
+        try:
+            self._ensure_row(DailyStats, day=day, new_users=0, active_users=0, searches=0, part_plays=0)
+            self._ensure_row(DailyActivity, day=day, worker=worker, active_users=0)
+            
+            session = self.get_session()
+            
+            new_users = session.query(func.count(User.id)).filter(
+                User.joined_at >= start,
+                User.joined_at < end
+            ).scalar()
+            
+            session.query(DailyActivity).filter_by(day=day, worker=worker).filter(
+                DailyActivity.active_users < active_users
+            ).update({'active_users': active_users}, synchronize_session=False)
+            
+            total_active = session.query(func.coalesce(func.sum(DailyActivity.active_users), 0)).filter(
+                DailyActivity.day == day
+            ).scalar()
+            
+            session.query(DailyStats).filter_by(day=day).update({
+                'new_users': new_users,
+                'active_users': total_active,
+                'searches': func.coalesce(DailyStats.searches, 0) + searches,
+                'part_plays': func.coalesce(DailyStats.part_plays, 0) + part_plays,
+                'updated_at': datetime.now()
+            }, synchronize_session=False)
+            
+            session.commit()
+            session.close()
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Kunlik statistika xatosi ({day}): {e}")
+            return False
+    
+    def _ensure_row(self, model, **values):
+        """Qator yo'q bo'lsa yaratish (parallel yaratishda xatolik e'tiborsiz)"""
+        key = tuple(values[c.name] for c in model.__table__.primary_key.columns)
+        session = self.get_session()
+        try:
+            if session.get(model, key) is None:
+                session.add(model(**values))
+                session.commit()
+        except IntegrityError:
+            session.rollback()
+        finally:
+            session.close()
+    
+    def get_daily_stats(self, days: int = 30) -> list:
+        """Oxirgi `days` kunlik statistika (faqat daily_stats jadvalidan)"""
+        since = date.today() - timedelta(days=days - 1)
+        
+        try:
+            session = self.get_session()
+            rows = session.query(DailyStats).filter(
+                DailyStats.day >= since
+            ).order_by(DailyStats.day).all()
+            session.close()
+            
+            return [{
+                'day': r.day,
+                'new_users': r.new_users or 0,
+                'active_users': r.active_users or 0,
+                'searches': r.searches or 0,
+                'part_plays': r.part_plays or 0
+            } for r in rows]
+            
+        except Exception as e:
+            logger.error(f"❌ Kunlik statistikani olish xatosi: {e}")
+            return []
+    
     def get_recent_users(self, limit: int = 10) -> list:
         """Oxirgi qo'shilgan foydalanuvchilar"""
         try:
@@ -286,8 +1031,358 @@ class Database:
             logger.error(f"❌ Foydalanuvchi tekshirish xatosi: {e}")
             return False
     
+    # ==================== BROADCAST OPERATIONS ====================
+    
+    def create_broadcast_job(self, message: str, total: int,
+                             chat_id: int = None, message_id: int = None) -> dict:
+        """Yangi broadcast vazifasini yaratish"""
+        try:
+            session = self.get_session()
+            job = BroadcastJob(
+                message=message,
+                total=total,
+                chat_id=chat_id,
+                message_id=message_id
+            )
+            session.add(job)
+            session.commit()
+            result = self._job_to_dict(job)
+            session.close()
+            
+            logger.info(f"✅ Broadcast vazifasi yaratildi: #{result['id']}")
+            return result
+            
+        except Exception as e:
+            logger.error(f"❌ Broadcast vazifasini yaratish xatosi: {e}")
+            return None
+    
+    def checkpoint_broadcast_job(self, job_id: int, cursor: int, sent: int,
+                                 failed: int, status: str = "running") -> bool:
+        """Broadcast holatini saqlash (har bir partiyadan keyin)"""
+        try:
+            session = self.get_session()
+            session.query(BroadcastJob).filter_by(id=job_id).update({
+                'cursor': cursor,
+                'sent': sent,
+                'failed': failed,
+                'status': status,
+                'updated_at': datetime.now()
+            })
+            session.commit()
+            session.close()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Broadcast checkpoint xatosi #{job_id}: {e}")
+            return False
+    
+    def get_unfinished_broadcast_jobs(self) -> list:
+        """Tugallanmagan broadcast vazifalari"""
+        try:
+            session = self.get_session()
+            jobs = session.query(BroadcastJob).filter_by(status="running").order_by(BroadcastJob.id).all()
+            session.close()
+            return [self._job_to_dict(j) for j in jobs]
+        except Exception as e:
+            logger.error(f"❌ Broadcast vazifalari xatosi: {e}")
+            return []
+    
+    # ==================== OMMAVIY IMPORT / EKSPORT ====================
+    
+    def import_movies(self, movies: list, update_existing: bool = False) -> dict:
+        """
+        Import partiyasini bitta tranzaksiyada yozish
+        
+        Mavjud kodlar bitta SELECT bilan aniqlanadi; yangilari bitta
+        ko'p qatorli INSERT, yangilanadiganlari bitta executemany UPDATE,
+        qismlar esa bitta INSERT bilan yoziladi.
+        
+        Args:
+            movies: Tekshirilgan qatorlar [{'code', 'name', 'category',
+                'description', 'file_id', 'file_type', 'parts'}, ...]
+                (kodlar partiya ichida takrorlanmasligi kerak)
+            update_existing: Mavjud kodlarni yangilash (aks holda o'tkazib yuboriladi)
+        
+        Returns:
+            dict: {'inserted', 'updated', 'skipped'} yoki xatolikda None
+        """
+        result = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        if not movies:
+            return result
+        
+        movies_table, parts_table = Movie.__table__, MoviePart.__table__
+        
+        try:
+            with self.engine.begin() as conn:
+                existing = set(conn.execute(
+                    select(movies_table.c.code).where(movies_table.c.code.in_([m['code'] for m in movies]))
+                ).scalars())
+                
+                new = [m for m in movies if m['code'] not in existing]
+                old = [m for m in movies if m['code'] in existing]
+                
+                if old and update_existing:
+                    codes = [m['code'] for m in old]
+                    conn.execute(parts_table.delete().where(parts_table.c.movie_code.in_(codes)))
+                    conn.execute(
+                        movies_table.update().where(movies_table.c.code == bindparam('b_code')),
+                        [{'b_code': m['code'], **self._movie_columns(m)} for m in old]
+                    )
+                    result['updated'] = len(old)
+                else:
+                    result['skipped'] = len(old)
+                    old = []
+                
+                if new:
+                    now = datetime.now()
+                    conn.execute(movies_table.insert(), [
+                        {'code': m['code'], 'created_at': now, **self._movie_columns(m)} for m in new
+                    ])
+                    result['inserted'] = len(new)
+                
+                part_rows = [row for m in new + old for row in self._part_rows(m['code'], m['parts'])]
+                if part_rows:
+                    conn.execute(parts_table.insert(), part_rows)
+            
+        except Exception as e:
+            logger.error(f"❌ Import partiyasi xatosi: {e}")
+            return None
+        
+        self.clear_catalog_cache()
+        self.bump_version(SYNC_CATALOG)
+        return result
+    
+    def get_catalog_batch(self, after_code: int = 0, limit: int = 1000, category: str = None) -> list:
+        """
+        Eksport uchun kinolar (qismlari bilan) - kod bo'yicha keyset sahifalash
+        
+        Returns:
+            list: [{'code', 'name', 'category', 'description', 'file_id',
+                    'file_type', 'parts': [{'name', 'file_id', 'file_type'}]}, ...]
+        """
+        try:
+            session = self.get_session()
+            query = session.query(Movie).filter(Movie.code > after_code)
+            if category:
+                query = query.filter(Movie.category == category)
+            movies = query.order_by(Movie.code).limit(limit).all()
+            
+            parts = {}
+            if movies:
+                rows = session.query(MoviePart).filter(
+                    MoviePart.movie_code.in_([m.code for m in movies])
+                ).order_by(MoviePart.movie_code, MoviePart.idx).all()
+                for p in rows:
+                    parts.setdefault(p.movie_code, []).append({
+                        'name': p.name,
+                        'file_id': p.file_id,
+                        'file_type': p.file_type
+                    })
+            
+            session.close()
+            return [{
+                'code': m.code,
+                'name': m.name,
+                'category': m.category,
+                'description': m.description,
+                'file_id': m.file_id,
+                'file_type': m.file_type,
+                'parts': parts.get(m.code, [])
+            } for m in movies]
+            
+        except Exception as e:
+            logger.error(f"❌ Katalog eksport xatosi: {e}")
+            return []
+    
+    # ==================== TELEGRAM FAYLLARI ====================
+    
+    def record_files(self, files: list) -> bool:
+        """
+        Fayl tekshiruvi natijalarini yozish (bitta tranzaksiyada)
+        
+        Args:
+            files: [{'file_id', 'kind', 'file_size', 'duration', 'mime_type',
+                     'status', 'error'}, ...]
+        """
+        if not files:
+            return True
+        
+        try:
+            session = self.get_session()
+            for f in files:
+                session.merge(TelegramFile(**f, checked_at=datetime.now()))
+            session.commit()
+            session.close()
+            self.bump_version(SYNC_FILES)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Fayl ma'lumotlarini yozish xatosi: {e}")
+            return False
+    
+    def get_dead_file_ids(self) -> list:
+        """Yaroqsiz deb belgilangan file_id lar"""
+        try:
+            session = self.get_session()
+            rows = session.query(TelegramFile.file_id).filter(TelegramFile.status == "dead").all()
+            session.close()
+            return [file_id for file_id, in rows]
+        except Exception as e:
+            logger.error(f"❌ Yaroqsiz fayllarni olish xatosi: {e}")
+            return []
+    
+    def get_files_to_validate(self, checked_before: datetime, limit: int = 500) -> list:
+        """
+        Hali tekshirilmagan yoki `checked_before` dan oldin tekshirilgan
+        katalog fayllari
+        
+        Returns:
+            list: [(file_id, saqlangan file_type), ...]
+        """
+        try:
+            session = self.get_session()
+            result = []
+            
+            for column, type_column in ((Movie.file_id, Movie.file_type),
+                                        (MoviePart.file_id, MoviePart.file_type)):
+                if len(result) >= limit:
+                    break
+                rows = session.query(column, type_column).outerjoin(
+                    TelegramFile, TelegramFile.file_id == column
+                ).filter(
+                    column.isnot(None),
+                    or_(TelegramFile.file_id.is_(None), TelegramFile.checked_at < checked_before)
+                ).limit(limit - len(result)).all()
+                result.extend(rows)
+            
+            session.close()
+            return [(file_id, file_type) for file_id, file_type in result]
+            
+        except Exception as e:
+            logger.error(f"❌ Tekshiriladigan fayllarni olish xatosi: {e}")
+            return []
+    
+    def get_file_status_counts(self) -> dict:
+        """Tekshirilgan fayllar: {'ok': ..., 'dead': ...}"""
+        try:
+            session = self.get_session()
+            rows = session.query(TelegramFile.status, func.count(TelegramFile.file_id)).group_by(
+                TelegramFile.status
+            ).all()
+            session.close()
+            return {status: count for status, count in rows}
+        except Exception as e:
+            logger.error(f"❌ Fayl statistikasi xatosi: {e}")
+            return {}
+    
+    # ==================== KESH VERSIYALARI ====================
+    
+    def bump_version(self, name: str) -> None:
+        """Boshqa jarayonlarga kesh eskirganini bildirish"""
+        try:
+            table = SyncVersion.__table__
+            with self.engine.begin() as conn:
+                updated = conn.execute(
+                    table.update().where(table.c.name == name).values(version=table.c.version + 1)
+                ).rowcount
+                if not updated:
+                    conn.execute(table.insert().values(name=name, version=1))
+        except IntegrityError:
+            # Qatorni boshqa worker shu payt yaratdi - versiya baribir o'zgardi
+            pass
+        except Exception as e:
+            logger.error(f"❌ Kesh versiyasini oshirish xatosi ({name}): {e}")
+    
+    def get_sync_versions(self) -> dict:
+        """{nom: versiya}"""
+        try:
+            session = self.get_session()
+            rows = session.query(SyncVersion.name, SyncVersion.version).all()
+            session.close()
+            return {name: version for name, version in rows}
+        except Exception as e:
+            logger.error(f"❌ Kesh versiyalarini olish xatosi: {e}")
+            return {}
+    
+    # ==================== BOT STATE (PERSISTENCE) ====================
+    
+    def load_bot_state(self, kind: str) -> dict:
+        """
+        Bir turdagi barcha saqlangan holatlar
+        
+        Returns:
+            dict: {key: data (bytes)}
+        """
+        try:
+            session = self.get_session()
+            rows = session.query(BotState.key, BotState.data).filter(BotState.kind == kind).all()
+            session.close()
+            return {key: bytes(data) for key, data in rows}
+        except Exception as e:
+            logger.error(f"❌ Bot holatini yuklash xatosi ({kind}): {e}")
+            return {}
+    
+    def save_bot_state(self, rows: list) -> bool:
+        """
+        Holatlarni bitta tranzaksiyada yozish
+        
+        Args:
+            rows: [(kind, key, data), ...] - data None bo'lsa qator o'chiriladi
+        """
+        if not rows:
+            return True
+        
+        upserts = [
+            {'kind': kind, 'key': key, 'data': data, 'updated_at': datetime.now()}
+            for kind, key, data in rows if data is not None
+        ]
+        deletes = [(kind, key) for kind, key, data in rows if data is None]
+        
+        try:
+            with self.engine.begin() as conn:
+                table = BotState.__table__
+                
+                if deletes:
+                    conn.execute(table.delete().where(or_(*[
+                        and_(table.c.kind == kind, table.c.key == key) for kind, key in deletes
+                    ])))
+                
+                if upserts and self.is_postgres:
+                    stmt = pg_insert(table).values(upserts)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[table.c.kind, table.c.key],
+                        set_={'data': stmt.excluded.data, 'updated_at': stmt.excluded.updated_at}
+                    )
+                    conn.execute(stmt)
+                elif upserts:
+                    conn.execute(table.delete().where(or_(*[
+                        and_(table.c.kind == row['kind'], table.c.key == row['key']) for row in upserts
+                    ])))
+                    conn.execute(table.insert(), upserts)
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Bot holatini yozish xatosi: {e}")
+            return False
+    
     # ==================== YORDAMCHI FUNKSIYALAR ====================
     
+    def _invalidate_catalog(self, code: int):
+        """Katalog o'zgarganda tegishli keshlarni tozalash"""
+        self.movie_cache.invalidate(code)
+        self.count_cache.clear()
+        self.overview_cache.clear()
+        self.bump_version(SYNC_CATALOG)
+    
+    def clear_catalog_cache(self):
+        """Barcha katalog keshlarini tozalash (masalan, boshqa worker o'zgartirganda)"""
+        self.movie_cache.clear()
+        self.count_cache.clear()
+        self.overview_cache.clear()
+    
+    def get_cache_stats(self) -> dict:
+        """Kino keshi statistikasi (hit/miss)"""
+        return self.movie_cache.stats()
+    
     def _movie_to_dict(self, movie) -> dict:
         """Movie obyektini dict ga o'girish"""
         return {
@@ -298,10 +1393,53 @@ class Database:
             'description': movie.description,
             'file_id': movie.file_id,
             'file_type': movie.file_type,
-            'parts': movie.parts if movie.parts else [],
+            'part_count': movie.part_count or 1,
             'created_at': movie.created_at
         }
     
+    @staticmethod
+    def _part_rows(code: int, parts: list, start: int = 1) -> list:
+        """Qismlar ro'yxatini movie_parts qatorlariga o'girish"""
+        return [{
+            'movie_code': code,
+            'idx': i,
+            'name': part.get('name') or f"{i}-qism",
+            'file_id': part['file_id'],
+            'file_type': part.get('file_type', 'video')
+        } for i, part in enumerate(parts, start)]
+    
+    @staticmethod
+    def _movie_columns(movie: dict) -> dict:
+        """Import qatoridan movies jadvali ustunlari"""
+        return {
+            'name': movie['name'],
+            'search_name': normalize_name(movie['name']),
+            'category': movie['category'],
+            'description': movie['description'],
+            'file_id': None if movie['parts'] else movie['file_id'],
+            'file_type': movie['file_type'],
+            'part_count': len(movie['parts']) or 1
+        }
+    
+    @staticmethod
+    def _row_columns() -> tuple:
+        """MovieRow uchun ustunlar (proyeksiya)"""
+        return (Movie.code, Movie.name, Movie.category, func.coalesce(Movie.part_count, 1))
+    
+    def _job_to_dict(self, job) -> dict:
+        """BroadcastJob obyektini dict ga o'girish"""
+        return {
+            'id': job.id,
+            'message': job.message,
+            'status': job.status,
+            'cursor': job.cursor or 0,
+            'sent': job.sent or 0,
+            'failed': job.failed or 0,
+            'total': job.total or 0,
+            'chat_id': job.chat_id,
+            'message_id': job.message_id
+        }
+    
     def _user_to_dict(self, user) -> dict:
         """User obyektini dict ga o'girish"""
         return {
@@ -309,9 +1447,69 @@ class Database:
             'user_id': user.user_id,
             'username': user.username,
             'first_name': user.first_name,
-            'joined_at': user.joined_at
+            'joined_at': user.joined_at,
+            'is_active': user.is_active,
+            'blocked_at': user.blocked_at
         }
 
 
+# ==================== ASYNC DATABASE ====================
+class AsyncDatabase:
+    """
+    Database metodlarini event loop ni bloklamasdan chaqirish uchun fasad.
+    
+    Har bir sinxron metod alohida thread pool da bajariladi va awaitable
+    sifatida qaytariladi: `await async_db.get_movie_by_code(123)`.
+    Thread lar soni connection pool hajmidan oshmaydi, shuning uchun
+    navbat Postgres ga emas, executor ga tushadi.
+    """
+    
+    def __init__(self, database: Database, max_workers: int):
+        self.db = database
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="db"
+        )
+    
+    async def run(self, func, *args, **kwargs):
+        """Ixtiyoriy sinxron funksiyani executor da bajarish"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(func, *args, **kwargs)
+        )
+    
+    def __getattr__(self, name: str):
+        attr = getattr(self.db, name)
+        
+        if name.startswith("_") or not callable(attr):
+            return attr
+        
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        
+        return wrapper
+    
+    async def iter_user_batches(self, after_id: int = 0, batch_size: int = 1000):
+        """
+        Foydalanuvchilarni partiyalab qaytaruvchi async generator
+        
+        Yields:
+            list: [(users.id, user_id), ...] - users.id o'sish tartibida
+        """
+        while True:
+            batch = await self.get_user_id_batch(after_id, batch_size)
+            if not batch:
+                return
+            after_id = batch[-1][0]
+            yield batch
+    
+    def shutdown(self):
+        """Executor ni yopish"""
+        self._executor.shutdown(wait=True)
+
+
 # ==================== GLOBAL DATABASE INSTANCE ====================
 db = Database(DATABASE_URL)
+async_db = AsyncDatabase(db, max_workers=DB_POOL_SIZE)
@@ -0,0 +1,188 @@
+import logging
+from datetime import datetime, timedelta
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter, TelegramError
+from config import FILE_VALIDATE_BATCH, FILE_VALIDATE_RATE, FILE_RECHECK_DAYS, FILE_PROBE_CHAT_ID
+from database import async_db
+from broadcast import TokenBucket
+from untils.file_id import decode_file_type
+
+logger = logging.getLogger(__name__)
+
+# Izoh (caption) bilan yuborish mumkin bo'lgan turlar: tur -> send_* parametri
+SENDABLE_KINDS = ("video", "document", "animation", "audio", "photo", "voice")
+
+_DEAD_MARKERS = ("wrong file identifier", "wrong remote file identifier", "file_id_invalid", "invalid file id")
+
+
+def is_dead_file_error(error: BadRequest) -> bool:
+    """Xatolik file_id yaroqsizligini bildiradimi"""
+    message = str(error).lower()
+    return any(marker in message for marker in _DEAD_MARKERS)
+
+
+def send_kind(file_id: str, stored_type: str = None) -> str:
+    """
+    Yuborish usulini tanlash
+
+    file_id ichidagi tur ustun - bazadagi file_type noto'g'ri bo'lsa ham
+    (masalan, 'serial' yoki video document sifatida saqlangan) birinchi
+    urinishda to'g'ri metod chaqiriladi.
+    """
+    kind = decode_file_type(file_id)
+    if kind in SENDABLE_KINDS:
+        return kind
+    return "document" if stored_type == "document" else "video"
+
+
+def attachment_metadata(file_id: str, attachment) -> dict:
+    """Xabardagi fayl obyektidan telegram_files qatori"""
+    return {
+        'file_id': file_id,
+        'kind': decode_file_type(file_id),
+        'file_size': getattr(attachment, 'file_size', None),
+        'duration': getattr(attachment, 'duration', None),
+        'mime_type': getattr(attachment, 'mime_type', None),
+        'status': "ok",
+        'error': None
+    }
+
+
+# ==================== FAYLLAR REESTRI ====================
+class FileRegistry:
+    """
+    Yaroqsiz file_id lar (xotirada) va fayl yuborish
+
+    Yaroqsiz fayl foydalanuvchiga yuborilmaydi - Telegram ga keraksiz
+    so'rov va "Xatolik yuz berdi" o'rniga darhol tushunarli javob.
+    """
+
+    def __init__(self):
+        self.dead = set()
+
+    async def load(self) -> None:
+        self.dead = set(await async_db.get_dead_file_ids())
+        if self.dead:
+            logger.warning(f"⚠️ {len(self.dead)} ta yaroqsiz fayl bor")
+
+    def is_dead(self, file_id: str) -> bool:
+        return file_id in self.dead
+
+    async def mark_dead(self, file_id: str, error: str) -> None:
+        self.dead.add(file_id)
+        await async_db.record_files([{
+            'file_id': file_id,
+            'kind': decode_file_type(file_id),
+            'file_size': None,
+            'duration': None,
+            'mime_type': None,
+            'status': "dead",
+            'error': error[:255]
+        }])
+        logger.warning(f"💀 Yaroqsiz fayl: {file_id[:20]}... ({error})")
+
+    async def remember(self, message: Message) -> None:
+        """Admin yuklagan fayl ma'lumotlarini saqlash (tekshiruvsiz)"""
+        attachment = message.video or message.document or message.animation
+        if attachment:
+            self.dead.discard(attachment.file_id)
+            await async_db.record_files([attachment_metadata(attachment.file_id, attachment)])
+
+    async def send(self, bot, chat_id: int, file_id: str, stored_type: str = None, **kwargs) -> Message:
+        """
+        Faylni to'g'ri send_* metodi bilan yuborish
+
+        Raises:
+            BadRequest: Yuborib bo'lmadi (yaroqsiz bo'lsa reestrga yoziladi)
+        """
+        kind = send_kind(file_id, stored_type)
+        try:
+            return await getattr(bot, f"send_{kind}")(chat_id=chat_id, **{kind: file_id}, **kwargs)
+        except BadRequest as e:
+            if is_dead_file_error(e):
+                await self.mark_dead(file_id, str(e))
+            raise
+
+
+file_registry = FileRegistry()
+
+
+# ==================== FON TEKSHIRUVI ====================
+class FileValidator:
+    """
+    Katalogdagi file_id larni cheklangan tezlikda tekshirish
+
+    FILE_PROBE_CHAT_ID berilgan bo'lsa fayl shu chatga yuborilib
+    (va o'chirilib) hajmi, davomiyligi va mime turi olinadi; aks holda
+    get_file bilan faqat mavjudligi va hajmi tekshiriladi (20 MB dan
+    katta fayllar uchun Telegram "file is too big" qaytaradi - bu
+    fayl tirik degani).
+    """
+
+    def __init__(self, rate: float = FILE_VALIDATE_RATE, probe_chat_id: int = FILE_PROBE_CHAT_ID):
+        self.bucket = TokenBucket(rate)
+        self.probe_chat_id = probe_chat_id
+
+    async def check(self, bot, file_id: str, stored_type: str) -> dict:
+        """Bitta faylni tekshirish -> telegram_files qatori"""
+        row = attachment_metadata(file_id, None)
+
+        while True:
+            await self.bucket.acquire()
+            try:
+                if self.probe_chat_id:
+                    kind = send_kind(file_id, stored_type)
+                    message = await getattr(bot, f"send_{kind}")(
+                        chat_id=self.probe_chat_id, **{kind: file_id}, disable_notification=True
+                    )
+                    row = attachment_metadata(file_id, message.effective_attachment)
+                    await message.delete()
+                else:
+                    telegram_file = await bot.get_file(file_id)
+                    row['file_size'] = telegram_file.file_size
+                return row
+
+            except RetryAfter as e:
+                self.bucket.pause(e.retry_after)
+
+            except BadRequest as e:
+                if is_dead_file_error(e):
+                    return {**row, 'status': "dead", 'error': str(e)[:255]}
+                # "file is too big" va boshqalar - fayl tirik
+                return {**row, 'error': str(e)[:255]}
+
+    async def run(self, bot, limit: int = FILE_VALIDATE_BATCH) -> dict:
+        """Navbatdagi partiyani tekshirish"""
+        checked_before = datetime.now() - timedelta(days=FILE_RECHECK_DAYS)
+        files = await async_db.get_files_to_validate(checked_before, limit)
+        result = {'checked': 0, 'dead': 0}
+
+        rows = []
+        for file_id, stored_type in files:
+            try:
+                row = await self.check(bot, file_id, stored_type)
+            except TelegramError as e:
+                # Tarmoq xatosi - keyingi safar qayta tekshiriladi
+                logger.warning(f"⚠️ Faylni tekshirib bo'lmadi: {e}")
+                continue
+
+            rows.append(row)
+            result['checked'] += 1
+            if row['status'] == "dead":
+                result['dead'] += 1
+                file_registry.dead.add(file_id)
+            else:
+                file_registry.dead.discard(file_id)
+
+        await async_db.record_files(rows)
+        return result
+
+
+file_validator = FileValidator()
+
+
+async def validate_files_job(context) -> None:
+    """JobQueue uchun: katalog fayllarini tekshirish"""
+    result = await file_validator.run(context.bot)
+    if result['checked']:
+        logger.info(f"🗂 Fayllar tekshirildi: {result['checked']} ta, yaroqsiz: {result['dead']} ta")
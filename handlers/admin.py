@@ -1,13 +1,24 @@
 import logging
+import os
+import tempfile
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.ext import CallbackContext, ConversationHandler, CommandHandler, MessageHandler, filters
-from database import db
+from telegram.ext import CallbackContext, ConversationHandler, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from database import async_db
+from broadcast import start_broadcast
+from files import file_registry
+from stats import render_chart
+from catalog_io import import_file, export_file, format_report
+from untils.helpers import safe_int, split_message
 from config import ADMIN_ID, CATEGORIES
+from handlers.keyboards import (
+    HOME_KEYBOARD, ADMIN_CATEGORY_KEYBOARD, DELETE_CATEGORY_KEYBOARD,
+    DELETE_BACK_BUTTON, DELETE_BACK_KEYBOARD, BROADCAST_CONFIRM_KEYBOARD
+)
 
 logger = logging.getLogger(__name__)
 
 # ConversationHandler holatlari
-VIDEO, NAME, CODE, CATEGORY, PARTS_COUNT, DESCRIPTION = range(6)
+VIDEO, NAME, CODE, CATEGORY, PARTS_COUNT, DESCRIPTION, APPEND_CODE, APPEND_VIDEO = range(8)
 
 
 # ==================== ADMIN TEKSHIRISH ====================
@@ -24,28 +35,10 @@ async def add_movie_start(update: Update, context: CallbackContext) -> int:
         await update.message.reply_text("❌ Bu buyruq faqat admin uchun!")
         return ConversationHandler.END
     
-    # Kategoriya tanlash tugmalari
-    buttons = []
-    row = []
-    
-    for i, (code, cat) in enumerate(CATEGORIES.items(), 1):
-        row.append(InlineKeyboardButton(
-            f"{cat['emoji']} {cat['name']}",
-            callback_data=f"admin_cat_{code}"
-        ))
-        if i % 2 == 0:
-            buttons.append(row)
-            row = []
-    
-    if row:
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton("❌ BEKOR QILISH", callback_data="admin_cancel")])
-    
     await update.message.reply_text(
         "🎬 <b>YANGI KINO QO'SHISH</b>\n\n"
         "1-qadam: Kategoriyani tanlang:",
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=ADMIN_CATEGORY_KEYBOARD,
         parse_mode="HTML"
     )
     
@@ -87,7 +80,7 @@ async def add_movie_code(update: Update, context: CallbackContext) -> int:
         return CODE
     
     # Kod bandligini tekshirish
-    existing = db.get_movie_by_code(code)
+    existing = await async_db.get_movie_by_code(code)
     if existing:
         await update.message.reply_text(
             f"❌ {code} kodli kino allaqachon mavjud!\n"
@@ -132,6 +125,7 @@ async def add_movie_video(update: Update, context: CallbackContext) -> int:
     
     context.user_data['new_movie_file_id'] = file_id
     context.user_data['new_movie_file_type'] = file_type
+    await file_registry.remember(update.message)
     
     category = context.user_data['new_movie_category']
     
@@ -181,8 +175,10 @@ async def add_movie_part_video(update: Update, context: CallbackContext) -> int:
     """Serial qismlari uchun video qabul qilish"""
     if update.message.video:
         file_id = update.message.video.file_id
+        file_type = "video"
     elif update.message.document:
         file_id = update.message.document.file_id
+        file_type = "document"
     else:
         await update.message.reply_text("❌ Iltimos, video yuboring!")
         return VIDEO
@@ -190,11 +186,14 @@ async def add_movie_part_video(update: Update, context: CallbackContext) -> int:
     current_part = context.user_data.get('current_part', 1)
     parts_count = context.user_data.get('new_movie_parts_count', 1)
     
+    await file_registry.remember(update.message)
+    
     # Qismni saqlash
     parts = context.user_data.get('new_movie_parts', [])
     parts.append({
         'name': f"{current_part}-qism",
-        'file_id': file_id
+        'file_id': file_id,
+        'file_type': file_type
     })
     context.user_data['new_movie_parts'] = parts
     
@@ -228,7 +227,7 @@ async def add_movie_description(update: Update, context: CallbackContext) -> int
     if category == "serial" and 'new_movie_parts' in context.user_data:
         # Serial - qismlar bilan
         parts = context.user_data['new_movie_parts']
-        success = db.add_serial(
+        success = await async_db.add_serial(
             code=code,
             name=name,
             category=category,
@@ -240,7 +239,7 @@ async def add_movie_description(update: Update, context: CallbackContext) -> int
         # Kino yoki multfilm - bitta video
         file_id = context.user_data['new_movie_file_id']
         file_type = context.user_data['new_movie_file_type']
-        success = db.add_movie(
+        success = await async_db.add_movie(
             code=code,
             name=name,
             category=category,
@@ -262,11 +261,9 @@ async def add_movie_description(update: Update, context: CallbackContext) -> int
             f"📝 Tavsif: {description}"
         )
         
-        buttons = [[InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")]]
-        
         await update.message.reply_text(
             result_text,
-            reply_markup=InlineKeyboardMarkup(buttons),
+            reply_markup=HOME_KEYBOARD,
             parse_mode="HTML"
         )
     else:
@@ -278,6 +275,94 @@ async def add_movie_description(update: Update, context: CallbackContext) -> int
     return ConversationHandler.END
 
 
+# ==================== /ADDPARTS - QISM QO'SHISH ====================
+async def append_parts_start(update: Update, context: CallbackContext) -> int:
+    """Mavjud serialga qism qo'shish boshlash"""
+    if not await is_admin(update):
+        await update.message.reply_text("❌ Bu buyruq faqat admin uchun!")
+        return ConversationHandler.END
+    
+    await update.message.reply_text(
+        "➕ <b>QISM QO'SHISH</b>\n\n"
+        "Serial KODINI kiriting:",
+        parse_mode="HTML"
+    )
+    
+    return APPEND_CODE
+
+
+async def append_parts_code(update: Update, context: CallbackContext) -> int:
+    """Serial kodini qabul qilish"""
+    try:
+        code = int(update.message.text.strip())
+    except ValueError:
+        await update.message.reply_text("❌ Kod raqam bo'lishi kerak! Qaytadan kiriting:")
+        return APPEND_CODE
+    
+    movie = await async_db.get_movie_by_code(code)
+    if not movie:
+        await update.message.reply_text(f"❌ {code} kodli kino topilmadi! Boshqa kod kiriting:")
+        return APPEND_CODE
+    
+    context.user_data['append_code'] = code
+    context.user_data['append_parts'] = []
+    
+    await update.message.reply_text(
+        f"✅ {movie['name']} (hozir {movie['part_count']} qism)\n\n"
+        f"Yangi qism videolarini ketma-ket yuboring.\n"
+        f"Tugatgach /done ni bosing."
+    )
+    
+    return APPEND_VIDEO
+
+
+async def append_parts_video(update: Update, context: CallbackContext) -> int:
+    """Yangi qism videosini yig'ish"""
+    if update.message.video:
+        part = {'file_id': update.message.video.file_id, 'file_type': "video"}
+    elif update.message.document:
+        part = {'file_id': update.message.document.file_id, 'file_type': "document"}
+    else:
+        await update.message.reply_text("❌ Iltimos, video yuboring!")
+        return APPEND_VIDEO
+    
+    parts = context.user_data.setdefault('append_parts', [])
+    parts.append(part)
+    await file_registry.remember(update.message)
+    
+    await update.message.reply_text(f"✅ {len(parts)}-yangi qism qabul qilindi. Yana yuboring yoki /done")
+    
+    return APPEND_VIDEO
+
+
+async def append_parts_done(update: Update, context: CallbackContext) -> int:
+    """Yig'ilgan qismlarni saqlash"""
+    code = context.user_data.get('append_code')
+    parts = context.user_data.get('append_parts', [])
+    
+    if not parts:
+        await update.message.reply_text("❌ Hech qanday video yuborilmadi. Video yuboring yoki /cancel")
+        return APPEND_VIDEO
+    
+    part_count = await async_db.append_movie_parts(code, parts)
+    
+    if part_count is None:
+        await update.message.reply_text("❌ Xatolik yuz berdi! Qismlar qo'shilmadi.")
+    else:
+        await update.message.reply_text(
+            f"✅ <b>{len(parts)} TA QISM QO'SHILDI!</b>\n\n"
+            f"🔢 Kod: {code}\n"
+            f"🎞 Jami qismlar: {part_count} ta",
+            reply_markup=HOME_KEYBOARD,
+            parse_mode="HTML"
+        )
+    
+    context.user_data.pop('append_code', None)
+    context.user_data.pop('append_parts', None)
+    
+    return ConversationHandler.END
+
+
 # ==================== /DELETE - KINO O'CHIRISH ====================
 async def delete_movie_start(update: Update, context: CallbackContext) -> None:
     """Kino o'chirish boshlash"""
@@ -285,36 +370,20 @@ async def delete_movie_start(update: Update, context: CallbackContext) -> None:
         await update.message.reply_text("❌ Bu buyruq faqat admin uchun!")
         return
     
-    # Kategoriya tanlash tugmalari
-    buttons = []
-    row = []
-    
-    for i, (code, cat) in enumerate(CATEGORIES.items(), 1):
-        row.append(InlineKeyboardButton(
-            f"{cat['emoji']} {cat['name']}",
-            callback_data=f"delete_cat_{code}"
-        ))
-        if i % 2 == 0:
-            buttons.append(row)
-            row = []
-    
-    if row:
-        buttons.append(row)
-    
     await update.message.reply_text(
         "🗑 <b>KINO O'CHIRISH</b>\n\n"
         "Kategoriyani tanlang:",
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=DELETE_CATEGORY_KEYBOARD,
         parse_mode="HTML"
     )
 
 
-async def delete_movie_category(update: Update, context: CallbackContext) -> None:
+async def delete_movie_category(update: Update, context: CallbackContext, category: str = None) -> None:
     """Kategoriya tanlanganda"""
     query = update.callback_query
     await query.answer()
     
-    category = query.data.replace("delete_cat_", "")
+    category = category or query.data.replace("delete_cat_", "")
     context.user_data['delete_category'] = category
     
     category_emoji = CATEGORIES[category]['emoji']
@@ -335,14 +404,12 @@ async def delete_movie_code(update: Update, context: CallbackContext) -> None:
         return
     
     category = context.user_data.get('delete_category')
-    movie = db.get_movie_by_code(code)
+    movie = await async_db.get_movie_by_code(code)
     
     if not movie:
         await update.message.reply_text(
             f"❌ {code} kodli kino topilmadi!",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🔙 QAYTISH", callback_data="back_to_admin_delete")
-            ]])
+            reply_markup=DELETE_BACK_KEYBOARD
         )
         return
     
@@ -351,14 +418,12 @@ async def delete_movie_code(update: Update, context: CallbackContext) -> None:
         await update.message.reply_text(
             f"❌ Bu kod {category_emoji} {movie['category']} kategoriyasiga tegishli!\n"
             f"Siz {CATEGORIES[category]['emoji']} {category} tanlagansiz.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🔙 QAYTISH", callback_data="back_to_admin_delete")
-            ]])
+            reply_markup=DELETE_BACK_KEYBOARD
         )
         return
     
     # Kino topildi - tasdiqlash
-    parts_count = len(movie.get('parts', [1]))
+    parts_count = movie['part_count']
     parts_text = f"{parts_count} qism" if parts_count > 1 else "1 qism"
     
     text = (
@@ -374,7 +439,7 @@ async def delete_movie_code(update: Update, context: CallbackContext) -> None:
             InlineKeyboardButton("✅ HA", callback_data=f"confirm_yes_{code}"),
             InlineKeyboardButton("❌ YO'Q", callback_data=f"confirm_no_{code}")
         ],
-        [InlineKeyboardButton("🔙 QAYTISH", callback_data="back_to_admin_delete")]
+        [DELETE_BACK_BUTTON]
     ]
     
     await update.message.reply_text(
@@ -386,34 +451,28 @@ async def delete_movie_code(update: Update, context: CallbackContext) -> None:
 
 async def admin_delete_execute(query, context: CallbackContext, code: int) -> None:
     """Kino o'chirishni amalga oshirish"""
-    movie = db.get_movie_by_code(code)
+    movie = await async_db.get_movie_by_code(code)
     
     if not movie:
         await query.edit_message_text(
             f"❌ {code} kodli kino topilmadi!",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            reply_markup=HOME_KEYBOARD
         )
         return
     
-    success = db.delete_movie(code)
+    success = await async_db.delete_movie(code)
     
     if success:
         await query.edit_message_text(
             f"✅ <b>KINO O'CHIRILDI!</b>\n\n"
             f"{CATEGORIES[movie['category']]['emoji']} {movie['name']} (Kod: {code})",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]]),
+            reply_markup=HOME_KEYBOARD,
             parse_mode="HTML"
         )
     else:
         await query.edit_message_text(
             f"❌ Xatolik yuz berdi! Kino o'chirilmadi.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            reply_markup=HOME_KEYBOARD
         )
 
 
@@ -422,25 +481,10 @@ async def back_to_admin_delete(update: Update, context: CallbackContext) -> None
     query = update.callback_query
     await query.answer()
     
-    buttons = []
-    row = []
-    
-    for i, (code, cat) in enumerate(CATEGORIES.items(), 1):
-        row.append(InlineKeyboardButton(
-            f"{cat['emoji']} {cat['name']}",
-            callback_data=f"delete_cat_{code}"
-        ))
-        if i % 2 == 0:
-            buttons.append(row)
-            row = []
-    
-    if row:
-        buttons.append(row)
-    
     await query.edit_message_text(
         "🗑 <b>KINO O'CHIRISH</b>\n\n"
         "Kategoriyani tanlang:",
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=DELETE_CATEGORY_KEYBOARD,
         parse_mode="HTML"
     )
 
@@ -465,7 +509,7 @@ async def send_message_start(update: Update, context: CallbackContext) -> None:
     context.user_data['broadcast_message'] = message
     
     # Tasdiqlash
-    users_count = len(db.get_all_users())
+    users_count = await async_db.get_user_count(active_only=True)
     
     text = (
         f"📝 <b>XABAR YUBORISH</b>\n\n"
@@ -474,16 +518,9 @@ async def send_message_start(update: Update, context: CallbackContext) -> None:
         f"Yuborishni tasdiqlaysizmi?"
     )
     
-    buttons = [
-        [
-            InlineKeyboardButton("✅ HA", callback_data="broadcast_confirm"),
-            InlineKeyboardButton("❌ YO'Q", callback_data="broadcast_cancel")
-        ]
-    ]
-    
     await update.message.reply_text(
         text,
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=BROADCAST_CONFIRM_KEYBOARD,
         parse_mode="HTML"
     )
 
@@ -498,43 +535,27 @@ async def broadcast_confirm(update: Update, context: CallbackContext) -> None:
         return
     
     message = context.user_data.get('broadcast_message')
-    users = db.get_all_users()
+    total = await async_db.get_user_count(active_only=True)
+    context.user_data.clear()
     
     await query.edit_message_text(
-        f"📤 Xabar yuborilmoqda... ({len(users)} ta foydalanuvchi)"
+        f"📤 Xabar yuborilmoqda... ({total} ta foydalanuvchi)"
     )
     
-    sent = 0
-    failed = 0
-    
-    for user in users:
-        try:
-            await context.bot.send_message(
-                chat_id=int(user['user_id']),
-                text=message,
-                parse_mode="HTML"
-            )
-            sent += 1
-        except Exception as e:
-            failed += 1
-            logger.error(f"Xabar yuborishda xatolik {user['user_id']}: {e}")
-    
-    result_text = (
-        f"📊 <b>XABAR YUBORISH NATIJASI</b>\n\n"
-        f"✅ Yuborildi: {sent} ta\n"
-        f"❌ Yuborilmadi: {failed} ta\n"
-        f"📈 Jami: {len(users)} ta"
+    # Vazifa bazaga yoziladi - bot qayta ishga tushsa ham davom etadi
+    job = await async_db.create_broadcast_job(
+        message=message,
+        total=total,
+        chat_id=query.message.chat_id,
+        message_id=query.message.message_id
     )
     
-    buttons = [[InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")]]
-    
-    await query.edit_message_text(
-        result_text,
-        reply_markup=InlineKeyboardMarkup(buttons),
-        parse_mode="HTML"
-    )
+    if not job:
+        await query.edit_message_text("❌ Xatolik yuz berdi! Xabar yuborilmadi.")
+        return
     
-    context.user_data.clear()
+    # Yuborish uzoq davom etadi - handler ni bloklamaslik uchun fonda
+    start_broadcast(context.bot, job)
 
 
 # ==================== /STATS - STATISTIKA ====================
@@ -544,49 +565,152 @@ async def stats_command(update: Update, context: CallbackContext) -> None:
         await update.message.reply_text("❌ Bu buyruq faqat admin uchun!")
         return
     
-    users = db.get_all_users()
-    movies = db.get_all_movies()
-    
-    # Kategoriya bo'yicha kinolar soni
-    movies_by_category = {
-        'kino': 0,
-        'serial': 0,
-        'multfilm': 0
-    }
-    
-    for movie in movies:
-        cat = movie.get('category', 'kino')
-        if cat in movies_by_category:
-            movies_by_category[cat] += 1
-    
-    # Oxirgi 24 soatdagi foydalanuvchilar
-    from datetime import datetime, timedelta
-    yesterday = datetime.now() - timedelta(days=1)
-    new_users_today = 0
-    # Bu qism database funksiyasi bilan to'ldiriladi
+    stats = await async_db.get_stats()
+    new_users = stats['new_users']
     
     text = (
         f"📊 <b>BOT STATISTIKASI</b>\n\n"
         f"👥 <b>FOYDALANUVCHILAR:</b>\n"
-        f"├─ Jami: {len(users)} ta\n"
-        f"└─ Oxirgi 24 soat: +{new_users_today} ta\n\n"
+        f"├─ Jami: {stats['users_total']} ta\n"
+        f"├─ Faol: {stats['users_active']} ta\n"
+        f"├─ Oxirgi 1 soat: +{new_users['hour']} ta\n"
+        f"├─ Oxirgi 24 soat: +{new_users['day']} ta\n"
+        f"└─ Oxirgi 7 kun: +{new_users['week']} ta\n\n"
         
         f"🎬 <b>KINOLAR:</b>\n"
-        f"├─ Jami: {len(movies)} ta\n"
-        f"├─ 🎬 Kino: {movies_by_category['kino']} ta\n"
-        f"├─ 📺 Serial: {movies_by_category['serial']} ta\n"
-        f"└─ 🐰 Multfilm: {movies_by_category['multfilm']} ta"
+        f"├─ Jami: {stats['movies_total']} ta\n"
     )
     
-    buttons = [[InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")]]
+    categories = list(CATEGORIES.items())
+    for i, (code, cat) in enumerate(categories, 1):
+        branch = "└─" if i == len(categories) else "├─"
+        text += f"{branch} {cat['emoji']} {cat['name']}: {stats['movies_by_category'].get(code, 0)} ta\n"
+    
+    text += f"\n⚡️ Kesh: {stats['cache']['hit_rate'] * 100:.0f}% hit ({stats['cache']['size']} ta kino)"
+    text += f"\n🗂 Fayllar: {stats['files'].get('ok', 0)} ta tekshirilgan, {stats['files'].get('dead', 0)} ta yaroqsiz"
+    
+    # callback.py admin.py ni import qiladi - aylanma importdan qochish uchun shu yerda
+    from handlers.callback import router
+    timings = [t for t in router.timings() if t['calls']][:5]
+    if timings:
+        text += "\n\n⏱ <b>TUGMALAR (o'rtacha / max):</b>\n"
+        for i, t in enumerate(timings, 1):
+            branch = "└─" if i == len(timings) else "├─"
+            text += f"{branch} {t['route']}: {t['calls']} marta, {t['avg_ms']} / {t['max_ms']} ms\n"
     
     await update.message.reply_text(
         text,
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=HOME_KEYBOARD,
         parse_mode="HTML"
     )
 
 
+# ==================== /GROWTH - O'SISH GRAFIGI ====================
+async def growth_command(update: Update, context: CallbackContext) -> None:
+    """Oxirgi 30/90 kunlik o'sish (daily_stats jadvalidan)"""
+    if not await is_admin(update):
+        await update.message.reply_text("❌ Bu buyruq faqat admin uchun!")
+        return
+    
+    days = safe_int(context.args[0], 30) if context.args else 30
+    days = 90 if days > 30 else 30
+    
+    rows = await async_db.get_daily_stats(days)
+    
+    if not rows:
+        await update.message.reply_text("📊 Hali statistika yig'ilmagan.")
+        return
+    
+    text = (
+        f"📈 <b>OXIRGI {days} KUN</b>\n\n"
+        f"👥 Yangi: {sum(r['new_users'] for r in rows)} ta | "
+        f"🔍 Qidiruv: {sum(r['searches'] for r in rows)} ta | "
+        f"🎞 Qismlar: {sum(r['part_plays'] for r in rows)} ta\n\n"
+        f"<b>Yangi foydalanuvchilar:</b>\n"
+        f"{render_chart(rows, 'new_users')}\n\n"
+        f"<b>Faol foydalanuvchilar:</b>\n"
+        f"{render_chart(rows, 'active_users')}"
+    )
+    
+    for chunk in split_message(text):
+        await update.message.reply_text(chunk, parse_mode="HTML")
+
+
+# ==================== /IMPORT, /EXPORT - OMMAVIY KATALOG ====================
+CATALOG_EXTENSIONS = (".jsonl", ".json", ".csv")
+
+
+async def import_command(update: Update, context: CallbackContext) -> None:
+    """
+    Katalog faylini import qilish
+    
+    .jsonl/.csv faylni "/import" izohi bilan yuboring yoki faylga javoban
+    /import yozing. "/import update" - mavjud kodlar yangilanadi.
+    """
+    if not await is_admin(update):
+        await update.message.reply_text("❌ Bu buyruq faqat admin uchun!")
+        return
+    
+    message = update.message
+    reply = message.reply_to_message
+    document = message.document or (reply.document if reply else None)
+    
+    if not document or not (document.file_name or "").lower().endswith(CATALOG_EXTENSIONS):
+        await message.reply_text(
+            "📥 <b>KATALOG IMPORT</b>\n\n"
+            "JSONL yoki CSV faylni <code>/import</code> izohi bilan yuboring "
+            "(yoki faylga javoban /import yozing).\n"
+            "<code>/import update</code> - mavjud kodlarni yangilash\n\n"
+            "Ustunlar: code, name, category, description, file_id, file_type, parts",
+            parse_mode="HTML"
+        )
+        return
+    
+    update_existing = "update" in (message.caption or message.text or "").split()[1:]
+    status = await message.reply_text("📥 Import qilinmoqda...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, os.path.basename(document.file_name))
+        telegram_file = await document.get_file()
+        await telegram_file.download_to_drive(path)
+        
+        # Fayl oqim bilan o'qiladi va partiyalab yoziladi - DB thread ida
+        report = await async_db.run(import_file, path, update_existing)
+    
+    for i, chunk in enumerate(split_message(format_report(report))):
+        if i == 0:
+            await status.edit_text(chunk)
+        else:
+            await message.reply_text(chunk)
+
+
+async def export_command(update: Update, context: CallbackContext) -> None:
+    """Katalogni faylga eksport qilish: /export [kategoriya] [csv]"""
+    if not await is_admin(update):
+        await update.message.reply_text("❌ Bu buyruq faqat admin uchun!")
+        return
+    
+    args = [a.lower() for a in context.args or []]
+    category = next((a for a in args if a in CATEGORIES), None)
+    extension = "csv" if "csv" in args else "jsonl"
+    filename = f"catalog_{category or 'all'}.{extension}"
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, filename)
+        count = await async_db.run(export_file, path, category)
+        
+        if not count:
+            await update.message.reply_text("📋 Eksport qilinadigan kino yo'q.")
+            return
+        
+        with open(path, "rb") as f:
+            await update.message.reply_document(
+                document=f,
+                filename=filename,
+                caption=f"📤 {count} ta kino"
+            )
+
+
 # ==================== /CANCEL - BEKOR QILISH ====================
 async def cancel(update: Update, context: CallbackContext) -> int:
     """Jarayonni bekor qilish"""
@@ -610,15 +734,35 @@ add_movie_conv = ConversationHandler(
         PARTS_COUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, add_movie_parts_count)],
         DESCRIPTION: [MessageHandler(filters.TEXT & ~filters.COMMAND, add_movie_description)],
     },
-    fallbacks=[CommandHandler("cancel", cancel)]
+    fallbacks=[CommandHandler("cancel", cancel)],
+    name="add_movie",
+    persistent=True  # Restartdan keyin ham qoralama davom etadi
 )
 
-# Delete handlers
-delete_category_handler = CallbackQueryHandler(delete_movie_category, pattern="^delete_cat_")
-delete_code_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, delete_movie_code)
-back_to_delete_handler = CallbackQueryHandler(back_to_admin_delete, pattern="^back_to_admin_delete$")
+# Append parts conversation handler
+append_parts_conv = ConversationHandler(
+    entry_points=[CommandHandler("addparts", append_parts_start)],
+    states={
+        APPEND_CODE: [MessageHandler(filters.TEXT & ~filters.COMMAND, append_parts_code)],
+        APPEND_VIDEO: [
+            MessageHandler(filters.VIDEO | filters.Document.ALL, append_parts_video),
+            CommandHandler("done", append_parts_done)
+        ],
+    },
+    fallbacks=[CommandHandler("cancel", cancel)],
+    name="append_parts",
+    persistent=True
+)
 
-# Broadcast handlers
-broadcast_handler = CallbackQueryHandler(broadcast_confirm, pattern="^broadcast_")
+# Delete handlers (delete_cat_, back_to_admin_delete va broadcast_ tugmalari - handlers/callback.py da)
+delete_code_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, delete_movie_code)
 
 # Other 
+delete_command = CommandHandler("delete", delete_movie_start)
+send_command = CommandHandler("send", send_message_start)
+stats_command_handler = CommandHandler("stats", stats_command)
+growth_command_handler = CommandHandler("growth", growth_command)
+import_command_handler = CommandHandler("import", import_command)
+import_document_handler = MessageHandler(filters.Document.ALL & filters.CaptionRegex(r"^/import\b"), import_command)
+export_command_handler = CommandHandler("export", export_command)
+cancel_command = CommandHandler("cancel", cancel)
@@ -1,116 +1,127 @@
 import logging
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.ext import CallbackContext
+from telegram import Update
+from telegram.ext import CallbackContext, CallbackQueryHandler
+from config import CATEGORIES, CALLBACK_SLOW_MS
+from untils.router import CallbackRouter, BadCallbackData, positive_int, one_of
+from handlers.keyboards import HOME_KEYBOARD, NOOP_CALLBACK
+from handlers.start import check_subscription, back_to_main, show_help
+from handlers.movie import (
+    category_handler,
+    show_category_movielist,
+    show_movielist,
+    show_movielist_page,
+    show_category_page,
+    show_parts,
+    send_part
+)
+from handlers.admin import (
+    is_admin,
+    admin_delete_execute,
+    delete_movie_category,
+    back_to_admin_delete,
+    broadcast_confirm
+)
 
 logger = logging.getLogger(__name__)
 
+category = one_of(CATEGORIES)
 
-async def callback_handler(update: Update, context: CallbackContext):
-    """Barcha callback tugmalarni qayta ishlash"""
+
+# ==================== OBUNA TEKSHIRISH ====================
+async def subscription_checked(update: Update, context: CallbackContext):
+    """"Obuna bo'ldim" tugmasi"""
     query = update.callback_query
-    await query.answer()
-    
-    data = query.data
-    logger.info(f"Callback: {data}")
-    
-    # ==================== OBUNA TEKSHIRISH ====================
-    if data == "check_subscription":
-        from handlers.start import check_subscription
-        is_subscribed, _, channels = await check_subscription(update, context)
-        
-        if is_subscribed:
-            await query.edit_message_text(
-                "✅ Obuna tasdiqlandi! /start ni bosing."
-            )
-        else:
-            await query.answer(
-                "❌ Hali ham obuna bo'lmagansiz!",
-                show_alert=True
-            )
-    
-    # ==================== ASOSIY MENYU ====================
-    elif data == "back_to_main":
-        from handlers.start import back_to_main
-        await back_to_main(update, context)
-    
-    # ==================== YORDAM ====================
-    elif data == "show_help":
-        from handlers.start import show_help
-        await show_help(update, context)
-    
-    # ==================== KATEGORIYA TANLASH ====================
-    elif data.startswith("cat_"):
-        from handlers.movie import category_handler
-        await category_handler(update, context)
-    
-    # ==================== KATEGORIYA RO'YXATI ====================
-    elif data.startswith("list_"):
-        from handlers.movie import show_category_movielist
-        await show_category_movielist(update, context)
-    
-    # ==================== UMUMIY RO'YXAT ====================
-    elif data == "show_movielist":
-        from handlers.movie import show_movielist
-        await show_movielist(update, context)
-    
-    # ==================== RO'YXAT SAHIFALARI ====================
-    elif data.startswith("page_"):
-        from handlers.movie import show_movielist_page
-        page = int(data.split("_")[1])
-        await show_movielist_page(update, context, page)
-    
-    # ==================== KATEGORIYA SAHIFALARI ====================
-    elif data.startswith("catpage_"):
-        from handlers.movie import show_category_page
-        parts = data.split("_")
-        category = parts[1]
-        page = int(parts[2])
-        await show_category_page(update, context, category, page)
-    
-    # ==================== SERIAL QISMLARI ====================
-    elif data.startswith("parts_"):
-        from handlers.movie import show_parts
-        code = int(data.split("_")[1])
-        await show_parts(update, context, code)
-    
-    # ==================== QISM YUBORISH ====================
-    elif data.startswith("part_"):
-        from handlers.movie import send_part
-        parts = data.split("_")
-        code = int(parts[1])
-        part_index = int(parts[2]) - 1
-        await send_part(update, context, code, part_index)
-    
-    # ==================== O'CHIRISH TASDIQLASH ====================
-    elif data.startswith("confirm_yes_"):
-        from handlers.admin import admin_delete_execute
-        code = int(data.split("_")[2])
-        await admin_delete_execute(update, context, code)
-    
-    elif data.startswith("confirm_no_"):
-        code = data.split("_")[2]
+    is_subscribed, _, channels = await check_subscription(update, context)
+
+    if is_subscribed:
+        await query.answer()
         await query.edit_message_text(
-            f"❌ O'chirish bekor qilindi (Kod: {code})",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            "✅ Obuna tasdiqlandi! /start ni bosing."
         )
-    
-    # ==================== ADMIN DELETE ====================
-    elif data.startswith("delete_cat_"):
-        from handlers.admin import delete_movie_category
-        await delete_movie_category(update, context)
-    
-    elif data == "back_to_admin_delete":
-        from handlers.admin import back_to_admin_delete
-        await back_to_admin_delete(update, context)
-    
-    # ==================== BROADCAST ====================
-    elif data.startswith("broadcast_"):
-        from handlers.admin import broadcast_confirm
-        await broadcast_confirm(update, context)
-    
-    # ==================== NOMA'LUM ====================
     else:
+        await query.answer(
+            "❌ Hali ham obuna bo'lmagansiz!",
+            show_alert=True
+        )
+
+
+# ==================== SERIAL QISMLARI ====================
+async def send_part_number(update: Update, context: CallbackContext, code: int, number: int):
+    """Qism raqami 1 dan boshlanadi, send_part esa indeks kutadi"""
+    await send_part(update, context, code, number - 1)
+
+
+# ==================== O'CHIRISH TASDIQLASH ====================
+async def confirm_delete(update: Update, context: CallbackContext, code: int):
+    await admin_delete_execute(update.callback_query, context, code)
+
+
+async def cancel_delete(update: Update, context: CallbackContext, code: int):
+    await update.callback_query.edit_message_text(
+        f"❌ O'chirish bekor qilindi (Kod: {code})",
+        reply_markup=HOME_KEYBOARD
+    )
+
+
+async def noop(update: Update, context: CallbackContext):
+    """Joriy sahifa tugmasi - faqat query.answer() (router da)"""
+
+
+# ==================== YO'NALISHLAR ====================
+router = CallbackRouter(slow_ms=CALLBACK_SLOW_MS)
+
+# Handler o'zi query.answer() chaqiradiganlarda answer=False
+router.exact_route("check_subscription", subscription_checked, answer=False)
+router.exact_route("back_to_main", back_to_main, answer=False)
+router.exact_route("show_help", show_help, answer=False)
+router.exact_route("show_movielist", show_movielist)
+router.exact_route(NOOP_CALLBACK, noop)
+
+router.prefix_route("cat_", category_handler, (category,))
+router.prefix_route("list_", show_category_movielist, (category,))
+router.prefix_route("page_", show_movielist_page, (positive_int,))
+router.prefix_route("catpage_", show_category_page, (category, positive_int))
+router.prefix_route("parts_", show_parts, (positive_int,))
+router.prefix_route("eps_", show_parts, (positive_int, positive_int))
+router.prefix_route("part_", send_part_number, (positive_int, positive_int))
+
+# Admin
+router.prefix_route("confirm_yes_", confirm_delete, (positive_int,), check=is_admin)
+router.prefix_route("confirm_no_", cancel_delete, (positive_int,), check=is_admin)
+router.prefix_route("delete_cat_", delete_movie_category, (category,), answer=False, check=is_admin)
+router.exact_route("back_to_admin_delete", back_to_admin_delete, answer=False, check=is_admin)
+router.exact_route("broadcast_confirm", broadcast_confirm, answer=False, check=is_admin)
+router.exact_route("broadcast_cancel", broadcast_confirm, answer=False, check=is_admin)
+
+
+async def callback_handler(update: Update, context: CallbackContext):
+    """Barcha callback tugmalarni qayta ishlash"""
+    query = update.callback_query
+    data = query.data
+
+    try:
+        route, args = router.resolve(data)
+    except BadCallbackData:
+        logger.warning(f"Noto'g'ri callback data: {data}")
+        await query.answer("❌ Eskirgan yoki noto'g'ri tugma!", show_alert=True)
+        return
+
+    if route is None:
         logger.warning(f"Noma'lum callback data: {data}")
         await query.answer("❌ Noma'lum buyruq!", show_alert=True)
+        return
+
+    if route.check and not await route.check(update):
+        route.rejected += 1
+        await query.answer("❌ Bu amal faqat admin uchun!", show_alert=True)
+        return
+
+    if route.answer:
+        await query.answer()
+
+    await router.dispatch(route, update, context, args)
+
+
+# Faqat ro'yxatdagi callbacklar ushlanadi - qolganlari (admin_cat_, ...)
+# ConversationHandler larga o'tadi
+callback_query_handler = CallbackQueryHandler(callback_handler, pattern=router.pattern())
@@ -0,0 +1,130 @@
+from functools import lru_cache
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from config import CATEGORIES, EPISODES_PER_PAGE, PART_KEYBOARD_CACHE_SIZE
+from untils.helpers import build_menu
+
+# Telegram obyektlari o'zgarmas (immutable) - bir marta quriladi va
+# barcha update lar uchun qayta ishlatiladi.
+
+# ==================== UMUMIY TUGMALAR ====================
+HOME_BUTTON = InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
+HOME_KEYBOARD = InlineKeyboardMarkup([[HOME_BUTTON]])
+
+
+def category_grid(prefix: str, n_cols: int = 2) -> list:
+    """Kategoriya tugmalari (2 tadan qatorda)"""
+    buttons = [
+        InlineKeyboardButton(f"{cat['emoji']} {cat['name']}", callback_data=f"{prefix}{code}")
+        for code, cat in CATEGORIES.items()
+    ]
+    return build_menu(buttons, n_cols=n_cols)
+
+
+# Hech narsa qilmaydigan tugma (joriy sahifa) - callback jimgina javoblanadi
+NOOP_CALLBACK = "noop"
+
+
+def pagination_buttons(prefix: str, page: int, total_pages: int) -> list:
+    """Oldingi/keyingi sahifa tugmalari qatori"""
+    row = []
+
+    if page > 1:
+        row.append(InlineKeyboardButton("⬅️ OLDINGI", callback_data=f"{prefix}{page - 1}"))
+    if page < total_pages:
+        row.append(InlineKeyboardButton("KEYINGI ➡️", callback_data=f"{prefix}{page + 1}"))
+
+    return row
+
+
+# ==================== ASOSIY MENYU ====================
+MAIN_MENU_KEYBOARD = InlineKeyboardMarkup(
+    [
+        [InlineKeyboardButton(f"{cat['emoji']} {cat['name']}", callback_data=f"cat_{code}")]
+        for code, cat in CATEGORIES.items()
+    ] + [
+        [InlineKeyboardButton("📋 KINOLAR RO'YXATI", callback_data="show_movielist")]
+    ]
+)
+
+# Kategoriya ichidagi menyu: kategoriya kodi -> klaviatura
+CATEGORY_KEYBOARDS = {
+    code: InlineKeyboardMarkup([
+        [InlineKeyboardButton(f"📋 {cat['name']}LAR RO'YXATI", callback_data=f"list_{code}")],
+        [HOME_BUTTON]
+    ])
+    for code, cat in CATEGORIES.items()
+}
+
+MOVIELIST_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📄 BARCHA KINOLAR", callback_data="page_1")],
+    [HOME_BUTTON]
+])
+
+# ==================== ADMIN ====================
+ADMIN_CATEGORY_KEYBOARD = InlineKeyboardMarkup(
+    category_grid("admin_cat_") + [
+        [InlineKeyboardButton("❌ BEKOR QILISH", callback_data="admin_cancel")]
+    ]
+)
+DELETE_CATEGORY_KEYBOARD = InlineKeyboardMarkup(category_grid("delete_cat_"))
+DELETE_BACK_BUTTON = InlineKeyboardButton("🔙 QAYTISH", callback_data="back_to_admin_delete")
+DELETE_BACK_KEYBOARD = InlineKeyboardMarkup([[DELETE_BACK_BUTTON]])
+BROADCAST_CONFIRM_KEYBOARD = InlineKeyboardMarkup([[
+    InlineKeyboardButton("✅ HA", callback_data="broadcast_confirm"),
+    InlineKeyboardButton("❌ YO'Q", callback_data="broadcast_cancel")
+]])
+
+
+# ==================== SERIAL QISMLARI ====================
+@lru_cache(maxsize=PART_KEYBOARD_CACHE_SIZE)
+def part_keyboard(code: int, part_count: int, page: int = 1) -> InlineKeyboardMarkup:
+    """
+    Qism tugmalari - sahifalangan (faqat qismlar sonidan quriladi)
+
+    Har sahifada EPISODES_PER_PAGE ta qism, pastida oraliqlarga o'tish
+    (1-20, 21-40, ...) va oldingi/keyingi tugmalari. Natija
+    (code, part_count, page) bo'yicha LRU keshda saqlanadi - qism
+    qo'shilsa part_count o'zgaradi va yangi klaviatura quriladi.
+    """
+    total_pages = max(1, (part_count + EPISODES_PER_PAGE - 1) // EPISODES_PER_PAGE)
+    page = min(max(page, 1), total_pages)
+
+    first = (page - 1) * EPISODES_PER_PAGE + 1
+    last = min(page * EPISODES_PER_PAGE, part_count)
+
+    episodes = [
+        InlineKeyboardButton(f"🎬 {i}-qism", callback_data=f"part_{code}_{i}")
+        for i in range(first, last + 1)
+    ]
+    buttons = build_menu(episodes, n_cols=4)
+
+    if total_pages > 1:
+        # Joriy sahifa atrofidagi oraliqlar (ko'pi bilan 5 ta)
+        start = max(1, min(page - 2, total_pages - 4))
+        ranges = []
+        for p in range(start, min(start + 4, total_pages) + 1):
+            p_first = (p - 1) * EPISODES_PER_PAGE + 1
+            p_last = min(p * EPISODES_PER_PAGE, part_count)
+            label = f"{p_first}-{p_last}"
+            if p == page:
+                # Xuddi shu sahifani qayta chizish "Message is not modified" beradi
+                ranges.append(InlineKeyboardButton(f"• {label} •", callback_data=NOOP_CALLBACK))
+            else:
+                ranges.append(InlineKeyboardButton(label, callback_data=f"eps_{code}_{p}"))
+        buttons.append(ranges)
+
+        nav = pagination_buttons(f"eps_{code}_", page, total_pages)
+        if nav:
+            buttons.append(nav)
+
+    buttons.append([HOME_BUTTON])
+    return InlineKeyboardMarkup(buttons)
+
+
+@lru_cache(maxsize=PART_KEYBOARD_CACHE_SIZE)
+def part_back_keyboard(code: int, page: int) -> InlineKeyboardMarkup:
+    """Qism videosi ostidagi tugmalar (qismlar sahifasiga qaytish)"""
+    return InlineKeyboardMarkup([[
+        InlineKeyboardButton("🔙 QISMLAR", callback_data=f"eps_{code}_{page}"),
+        HOME_BUTTON
+    ]])
@@ -1,32 +1,34 @@
 import logging
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.ext import CallbackContext
-from database import db
-from config import CATEGORIES
+from telegram import Update, InlineKeyboardMarkup
+from telegram.ext import CallbackContext, MessageHandler, filters
+from database import async_db
+from config import CATEGORIES, MOVIES_PER_PAGE, EPISODES_PER_PAGE
+from stats import activity
+from files import file_registry
+from handlers.keyboards import (
+    HOME_BUTTON, HOME_KEYBOARD, CATEGORY_KEYBOARDS, MOVIELIST_KEYBOARD,
+    pagination_buttons, part_keyboard, part_back_keyboard
+)
 
 logger = logging.getLogger(__name__)
 
+FILE_UNAVAILABLE_TEXT = "⚠️ Bu video hozircha mavjud emas. Admin tez orada yangilaydi."
+
 
 # ==================== KATEGORIYA TANLASH ====================
-async def category_handler(update: Update, context: CallbackContext):
+async def category_handler(update: Update, context: CallbackContext, category: str):
     """Kategoriya tanlanganda"""
     query = update.callback_query
     
-    category = query.data.replace("cat_", "")
     context.user_data['current_category'] = category
     
     category_name = CATEGORIES[category]['name']
     category_emoji = CATEGORIES[category]['emoji']
     
-    buttons = [
-        [InlineKeyboardButton(f"📋 {category_name}LAR RO'YXATI", callback_data=f"list_{category}")],
-        [InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")]
-    ]
-    
     await query.edit_message_text(
         f"{category_emoji} <b>{category_name} QIDIRISH</b>\n\n"
         f"<b>Kod kiriting</b> (masalan: 123):",
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=CATEGORY_KEYBOARDS[category],
         parse_mode="HTML"
     )
 
@@ -40,12 +42,12 @@ async def search_movie(update: Update, context: CallbackContext):
     if not category:
         await update.message.reply_text(
             "❌ Avval kategoriya tanlang! /start",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            reply_markup=HOME_KEYBOARD
         )
         return
     
+    activity.record_search(update.effective_user.id)
+    
     try:
         code = int(text)
         await search_by_code(update, context, code, category)
@@ -55,23 +57,19 @@ async def search_movie(update: Update, context: CallbackContext):
 
 async def search_by_code(update: Update, context: CallbackContext, code: int, category: str):
     """Kod orqali qidirish"""
-    movie = db.get_movie_by_code(code)
+    movie = await async_db.get_movie_by_code(code)
     
     if not movie:
         await update.message.reply_text(
             f"❌ {code} kodli kino topilmadi!",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            reply_markup=HOME_KEYBOARD
         )
         return
     
     if movie['category'] != category:
         await update.message.reply_text(
             f"❌ Bu kod {movie['category']} kategoriyasiga tegishli!",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            reply_markup=HOME_KEYBOARD
         )
         return
     
@@ -80,45 +78,46 @@ async def search_by_code(update: Update, context: CallbackContext, code: int, ca
 
 async def search_by_name(update: Update, context: CallbackContext, name: str, category: str):
     """Nom orqali qidirish"""
-    movies = db.search_movies_by_name(name, category)
+    movies = await async_db.search_movies_by_name(name, category)
     
     if not movies:
         await update.message.reply_text(
             f"❌ '{name}' nomli kino topilmadi!",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            reply_markup=HOME_KEYBOARD
         )
         return
     
     if len(movies) == 1:
-        await show_movie(update, context, movies[0])
+        movie = await async_db.get_movie_by_code(movies[0].code)
+        await show_movie(update, context, movie)
     else:
         text = f"🔍 '{name}' bo'yicha {len(movies)} ta natija:\n\n"
-        for m in movies[:10]:
-            parts = len(m.get('parts', [1]))
-            text += f"🎬 {m['code']}. {m['name']} ({parts} qism)\n"
+        for m in movies:
+            text += f"🎬 {m.code}. {m.name} ({m.part_count} qism)\n"
         
         text += "\nKodni kiriting:"
         
         await update.message.reply_text(
             text,
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            reply_markup=HOME_KEYBOARD
         )
 
 
 # ==================== KINO KO'RSATISH ====================
 async def show_movie(update: Update, context: CallbackContext, movie: dict):
     """Kinoni ko'rsatish"""
-    parts = movie.get('parts', [])
-    
-    if len(parts) > 1:
+    if movie['part_count'] > 1:
         await show_serial_parts(update, context, movie)
         return
     
-    file_id = movie.get('file_id') or (parts[0]['file_id'] if parts else None)
+    file_id = movie.get('file_id')
+    file_type = movie.get('file_type')
+    
+    if not file_id:
+        # Bitta qismli serial - qism movie_parts jadvalida
+        part = await async_db.get_movie_part(movie['code'], 1)
+        if part:
+            file_id, file_type = part['file_id'], part['file_type']
     
     if not file_id:
         await update.message.reply_text("❌ Video topilmadi!")
@@ -130,25 +129,20 @@ async def show_movie(update: Update, context: CallbackContext, movie: dict):
         f"📝 {movie['description']}"
     )
     
-    buttons = [[InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")]]
+    if file_registry.is_dead(file_id):
+        await update.message.reply_text(FILE_UNAVAILABLE_TEXT, reply_markup=HOME_KEYBOARD)
+        return
     
     try:
-        if movie.get('file_type') == 'video':
-            await context.bot.send_video(
-                chat_id=update.effective_chat.id,
-                video=file_id,
-                caption=caption,
-                parse_mode="HTML",
-                reply_markup=InlineKeyboardMarkup(buttons)
-            )
-        else:
-            await context.bot.send_document(
-                chat_id=update.effective_chat.id,
-                document=file_id,
-                caption=caption,
-                parse_mode="HTML",
-                reply_markup=InlineKeyboardMarkup(buttons)
-            )
+        await file_registry.send(
+            context.bot,
+            update.effective_chat.id,
+            file_id,
+            file_type,
+            caption=caption,
+            parse_mode="HTML",
+            reply_markup=HOME_KEYBOARD
+        )
     except Exception as e:
         logger.error(f"Video yuborishda xatolik: {e}")
         await update.message.reply_text("❌ Xatolik yuz berdi!")
@@ -156,37 +150,19 @@ async def show_movie(update: Update, context: CallbackContext, movie: dict):
 
 async def show_serial_parts(update: Update, context: CallbackContext, movie: dict):
     """Serial qismlarini ko'rsatish"""
-    parts = movie.get('parts', [])
     emoji = CATEGORIES[movie['category']]['emoji']
     
     text = (
         f"{emoji} <b>{movie['name']}</b>\n"
         f"🔢 Kod: {movie['code']}\n"
-        f"🎞 Qismlar: {len(parts)} ta\n"
+        f"🎞 Qismlar: {movie['part_count']} ta\n"
         f"📝 {movie['description']}\n\n"
         f"👇 Qismni tanlang:"
     )
     
-    buttons = []
-    row = []
-    
-    for i, part in enumerate(parts, 1):
-        row.append(InlineKeyboardButton(
-            f"🎬 {part.get('name', f'{i}-qism')}",
-            callback_data=f"part_{movie['code']}_{i}"
-        ))
-        if i % 2 == 0:
-            buttons.append(row)
-            row = []
-    
-    if row:
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")])
-    
     await update.message.reply_text(
         text,
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=part_keyboard(movie['code'], movie['part_count']),
         parse_mode="HTML"
     )
 
@@ -194,87 +170,73 @@ async def show_serial_parts(update: Update, context: CallbackContext, movie: dic
 async def send_part(update: Update, context: CallbackContext, code: int, part_index: int):
     """Serial qismini yuborish"""
     query = update.callback_query
-    movie = db.get_movie_by_code(code)
+    movie = await async_db.get_movie_by_code(code)
     
     if not movie:
         await query.edit_message_text("❌ Kino topilmadi!")
         return
     
-    parts = movie.get('parts', [])
+    part = await async_db.get_movie_part(code, part_index + 1)
     
-    if part_index >= len(parts):
+    if not part:
         await query.edit_message_text("❌ Qism topilmadi!")
         return
     
-    part = parts[part_index]
-    file_id = part.get('file_id')
-    
-    if not file_id:
-        await query.edit_message_text("❌ Video topilmadi!")
-        return
+    file_id = part['file_id']
     
     caption = (
-        f"{CATEGORIES[movie['category']]['emoji']} <b>{movie['name']} - {part.get('name', f'{part_index+1}-qism')}</b>\n"
+        f"{CATEGORIES[movie['category']]['emoji']} <b>{movie['name']} - {part['name']}</b>\n"
         f"🔢 Kod: {movie['code']}"
     )
     
-    buttons = [[
-        InlineKeyboardButton("🔙 QISMLAR", callback_data=f"parts_{code}"),
-        InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-    ]]
+    reply_markup = part_back_keyboard(code, part_index // EPISODES_PER_PAGE + 1)
+    
+    activity.record_part_play(update.effective_user.id)
+    
+    if file_registry.is_dead(file_id):
+        await query.message.reply_text(FILE_UNAVAILABLE_TEXT, reply_markup=reply_markup)
+        return
     
     try:
-        await context.bot.send_video(
-            chat_id=query.message.chat_id,
-            video=file_id,
+        await file_registry.send(
+            context.bot,
+            query.message.chat_id,
+            file_id,
+            part['file_type'],
             caption=caption,
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(buttons)
+            reply_markup=reply_markup
         )
     except Exception as e:
         logger.error(f"Video yuborishda xatolik: {e}")
         await query.edit_message_text("❌ Xatolik yuz berdi!")
 
 
-async def show_parts(update: Update, context: CallbackContext, code: int):
-    """Serial qismlarini qayta ko'rsatish"""
+async def show_parts(update: Update, context: CallbackContext, code: int, page: int = 1):
+    """Serial qismlarini qayta ko'rsatish (sahifa bo'yicha)"""
     query = update.callback_query
-    movie = db.get_movie_by_code(code)
+    movie = await async_db.get_movie_by_code(code)
+    
+    # Qism videosi ostidagi "🔙 QISMLAR" - izohli xabarni matnga aylantirib
+    # bo'lmaydi, shuning uchun yangi xabar yuboriladi
+    respond = query.edit_message_text if query.message.text is not None else query.message.reply_text
     
     if not movie:
-        await query.edit_message_text("❌ Kino topilmadi!")
+        await respond("❌ Kino topilmadi!")
         return
     
-    parts = movie.get('parts', [])
     emoji = CATEGORIES[movie['category']]['emoji']
     
     text = (
         f"{emoji} <b>{movie['name']}</b>\n"
         f"🔢 Kod: {movie['code']}\n"
-        f"🎞 Qismlar: {len(parts)} ta\n\n"
+        f"🎞 Qismlar: {movie['part_count']} ta\n\n"
         f"👇 Qismni tanlang:"
     )
     
-    buttons = []
-    row = []
-    
-    for i, part in enumerate(parts, 1):
-        row.append(InlineKeyboardButton(
-            f"🎬 {part.get('name', f'{i}-qism')}",
-            callback_data=f"part_{code}_{i}"
-        ))
-        if i % 2 == 0:
-            buttons.append(row)
-            row = []
-    
-    if row:
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")])
-    
-    await query.edit_message_text(
+    await respond(
         text,
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=part_keyboard(code, movie['part_count'], page),
         parse_mode="HTML"
     )
 
@@ -283,87 +245,118 @@ async def show_parts(update: Update, context: CallbackContext, code: int):
 async def show_movielist(update: Update, context: CallbackContext):
     """Barcha kinolar ro'yxati"""
     query = update.callback_query
-    movies = db.get_all_movies()
+    overview = await async_db.get_catalog_overview(top_n=5)
     
-    if not movies:
+    if not overview['total']:
         await query.edit_message_text(
             "📋 Kinolar ro'yxati bo'sh",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            reply_markup=HOME_KEYBOARD
         )
         return
     
-    text = f"📋 <b>KINOLAR RO'YXATI ({len(movies)} ta)</b>\n\n"
+    text = f"📋 <b>KINOLAR RO'YXATI ({overview['total']} ta)</b>\n\n"
     
-    for cat in ['kino', 'serial', 'multfilm']:
-        cat_movies = [m for m in movies if m['category'] == cat]
-        if cat_movies:
+    for cat in CATEGORIES:
+        cat_overview = overview['categories'].get(cat)
+        if cat_overview:
             emoji = CATEGORIES[cat]['emoji']
             text += f"{emoji} <b>{cat.upper()}</b>\n"
-            for m in cat_movies[:5]:
-                parts = len(m.get('parts', [1]))
-                text += f"  ├─ {m['code']}. {m['name']} ({parts} qism)\n"
-            if len(cat_movies) > 5:
-                text += f"  └─ ... va yana {len(cat_movies)-5} ta\n"
+            for m in cat_overview['movies']:
+                text += f"  ├─ {m.code}. {m.name} ({m.part_count} qism)\n"
+            if cat_overview['count'] > len(cat_overview['movies']):
+                text += f"  └─ ... va yana {cat_overview['count'] - len(cat_overview['movies'])} ta\n"
             text += "\n"
     
     text += "Kodni kiriting:"
     
     await query.edit_message_text(
         text,
-        reply_markup=InlineKeyboardMarkup([[
-            InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-        ]]),
+        reply_markup=MOVIELIST_KEYBOARD,
         parse_mode="HTML"
     )
 
 
-async def show_category_movielist(update: Update, context: CallbackContext):
+async def show_category_movielist(update: Update, context: CallbackContext, category: str):
     """Kategoriya bo'yicha kinolar ro'yxati"""
+    await show_category_page(update, context, category, 1)
+
+
+# ==================== SAHIFALASH ====================
+async def show_movielist_page(update: Update, context: CallbackContext, page: int):
+    """Sahifalangan ro'yxat"""
     query = update.callback_query
-    category = query.data.replace("list_", "")
     
-    movies = db.get_movies_by_category(category)
-    emoji = CATEGORIES[category]['emoji']
+    total = await async_db.count_movies()
+    total_pages = max(1, (total + MOVIES_PER_PAGE - 1) // MOVIES_PER_PAGE)
+    page = min(max(page, 1), total_pages)
+    
+    movies = await async_db.get_movies_page(page=page, per_page=MOVIES_PER_PAGE)
     
     if not movies:
         await query.edit_message_text(
-            f"{emoji} {category} kategoriyasida kinolar yo'q",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-            ]])
+            "📋 Kinolar ro'yxati bo'sh",
+            reply_markup=HOME_KEYBOARD
         )
         return
     
-    text = f"{emoji} <b>{category.upper()}LAR ({len(movies)} ta)</b>\n\n"
+    text = f"📋 <b>KINOLAR RO'YXATI ({total} ta)</b>\n📄 Sahifa: {page}/{total_pages}\n\n"
     
-    for movie in movies[:20]:
-        parts = len(movie.get('parts', [1]))
-        text += f"🎬 {movie['code']}. {movie['name']} ({parts} qism)\n"
+    for movie in movies:
+        emoji = CATEGORIES[movie.category]['emoji']
+        text += f"{emoji} {movie.code}. {movie.name} ({movie.part_count} qism)\n"
     
-    if len(movies) > 20:
-        text += f"\n... va yana {len(movies)-20} ta"
+    text += "\nKodni kiriting:"
     
-    text += f"\n\nKodni kiriting:"
+    buttons = []
+    nav = pagination_buttons("page_", page, total_pages)
+    if nav:
+        buttons.append(nav)
+    buttons.append([HOME_BUTTON])
     
     await query.edit_message_text(
         text,
-        reply_markup=InlineKeyboardMarkup([[
-            InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")
-        ]]),
+        reply_markup=InlineKeyboardMarkup(buttons),
         parse_mode="HTML"
     )
 
 
-# ==================== SAHIFALASH ====================
-async def show_movielist_page(update: Update, context: CallbackContext, page: int):
-    """Sahifalangan ro'yxat"""
-    # Bu funksiya keyin to'ldiriladi
-    pass
-
-
 async def show_category_page(update: Update, context: CallbackContext, category: str, page: int):
     """Kategoriya sahifasi"""
-    # Bu funksiya keyin to'ldiriladi
-    pass
+    query = update.callback_query
+    emoji = CATEGORIES[category]['emoji']
+    
+    total = await async_db.count_movies(category)
+    total_pages = max(1, (total + MOVIES_PER_PAGE - 1) // MOVIES_PER_PAGE)
+    page = min(max(page, 1), total_pages)
+    
+    movies = await async_db.get_movies_page(category, page, MOVIES_PER_PAGE)
+    
+    if not movies:
+        await query.edit_message_text(
+            f"{emoji} {category} kategoriyasida kinolar yo'q",
+            reply_markup=HOME_KEYBOARD
+        )
+        return
+    
+    text = f"{emoji} <b>{category.upper()}LAR ({total} ta)</b>\n📄 Sahifa: {page}/{total_pages}\n\n"
+    
+    for movie in movies:
+        text += f"🎬 {movie.code}. {movie.name} ({movie.part_count} qism)\n"
+    
+    text += f"\nKodni kiriting:"
+    
+    buttons = []
+    nav = pagination_buttons(f"catpage_{category}_", page, total_pages)
+    if nav:
+        buttons.append(nav)
+    buttons.append([HOME_BUTTON])
+    
+    await query.edit_message_text(
+        text,
+        reply_markup=InlineKeyboardMarkup(buttons),
+        parse_mode="HTML"
+    )
+
+
+# ==================== HANDLERLAR ====================
+search_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, search_movie)
@@ -1,49 +1,76 @@
+import asyncio
 import logging
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import CommandHandler, CallbackContext, CallbackQueryHandler  # ✅ QO'SHILDI!
 from datetime import datetime
-from config import ADMIN_ID, MANDATORY_CHANNELS, CATEGORIES
-from database import db
+from config import ADMIN_ID, MANDATORY_CHANNELS, SUBSCRIPTION_CACHE_TTL
+from registration import registration_buffer
+from stats import activity
+from untils.cache import TTLCache
+from handlers.keyboards import HOME_KEYBOARD, MAIN_MENU_KEYBOARD
 logger = logging.getLogger(__name__)
 
 
+# Obuna bo'lgan foydalanuvchilar: (user_id, kanal) -> True
+subscription_cache = TTLCache(ttl=SUBSCRIPTION_CACHE_TTL)
+# Kanal nomlari: kanal -> title (bir marta olinadi)
+channel_titles = {}
+
+
+async def get_channel_title(context: CallbackContext, channel: str) -> str:
+    """Kanal nomini olish (keshdan yoki API dan)"""
+    if channel in channel_titles:
+        return channel_titles[channel]
+    
+    try:
+        chat = await context.bot.get_chat(f"@{channel}")
+        channel_titles[channel] = chat.title or channel
+    except Exception as e:
+        # Xatolik bo'lsa keshlamaymiz - keyingi safar qayta urinib ko'riladi
+        logger.warning(f"⚠️ Kanal nomini olishda xatolik @{channel}: {e}")
+        return channel
+    
+    return channel_titles[channel]
+
+
+async def is_channel_member(context: CallbackContext, user_id: int, channel: str) -> bool:
+    """Bitta kanalga a'zolikni tekshirish"""
+    if subscription_cache.get((user_id, channel)):
+        return True
+    
+    try:
+        member = await context.bot.get_chat_member(
+            chat_id=f"@{channel}",
+            user_id=user_id
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Kanal tekshirishda xatolik @{channel}: {e}")
+        return False
+    
+    if member.status in ["left", "kicked"]:
+        return False
+    
+    subscription_cache.set((user_id, channel), True)
+    return True
+
+
 async def check_subscription(update: Update, context: CallbackContext):
-    """Obunani tekshirish"""
+    """Obunani tekshirish (barcha kanallar parallel)"""
     user_id = update.effective_user.id
-    not_subscribed = []
-    channel_info = []
-    
-    for channel in MANDATORY_CHANNELS:
-        channel = channel.strip()
-        if not channel:
-            continue
-        
-        try:
-            member = await context.bot.get_chat_member(
-                chat_id=f"@{channel}",
-                user_id=user_id
-            )
-            
-            if member.status in ["left", "kicked"]:
-                not_subscribed.append(channel)
-                try:
-                    chat = await context.bot.get_chat(f"@{channel}")
-                    channel_info.append({
-                        "username": channel,
-                        "title": chat.title or channel
-                    })
-                except:
-                    channel_info.append({
-                        "username": channel,
-                        "title": channel
-                    })
-        except Exception as e:
-            logger.warning(f"⚠️ Kanal tekshirishda xatolik @{channel}: {e}")
-            not_subscribed.append(channel)
-            channel_info.append({
-                "username": channel,
-                "title": channel
-            })
+    channels = [ch.strip() for ch in MANDATORY_CHANNELS if ch.strip()]
+    
+    results = await asyncio.gather(*[
+        is_channel_member(context, user_id, channel) for channel in channels
+    ])
+    not_subscribed = [ch for ch, ok in zip(channels, results) if not ok]
+    
+    titles = await asyncio.gather(*[
+        get_channel_title(context, channel) for channel in not_subscribed
+    ])
+    channel_info = [
+        {"username": channel, "title": title}
+        for channel, title in zip(not_subscribed, titles)
+    ]
     
     return len(not_subscribed) == 0, not_subscribed, channel_info
 
@@ -55,6 +82,7 @@ async def start(update: Update, context: CallbackContext):
     username = update.effective_user.username
     
     logger.info(f"📥 /start: {user_name} ({user_id})")
+    activity.record_active(update.effective_user.id)
     
     # Obunani tekshirish
     is_subscribed, _, channels_info = await check_subscription(update, context)
@@ -64,7 +92,7 @@ async def start(update: Update, context: CallbackContext):
         return
     
     # Foydalanuvchini databasega qo'shish
-    is_new = db.add_user(user_id, username, user_name)
+    is_new = await registration_buffer.register(user_id, username, user_name)
     
     # Yangi foydalanuvchi bo'lsa, adminga xabar
     if is_new and user_id != ADMIN_ID:  # ✅ String bilan solishtirish
@@ -90,23 +118,10 @@ async def start(update: Update, context: CallbackContext):
 
 async def show_main_menu(update: Update, context: CallbackContext, user_name: str):
     """Asosiy menyu"""
-    buttons = []
-    
-    for code, cat in CATEGORIES.items():
-        buttons.append([InlineKeyboardButton(
-            f"{cat['emoji']} {cat['name']}",
-            callback_data=f"cat_{code}"
-        )])
-    
-    buttons.append([InlineKeyboardButton(
-        "📋 KINOLAR RO'YXATI", 
-        callback_data="show_movielist"
-    )])
-    
     await update.message.reply_text(
         f"👋 Assalomu alaykum, <b>{user_name}</b>!\n\n"
         f"Kategoriyani tanlang:",
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=MAIN_MENU_KEYBOARD,
         parse_mode="HTML"
     )
 
@@ -147,22 +162,10 @@ async def back_to_main(update: Update, context: CallbackContext):
     
     user_name = update.effective_user.full_name
     
-    buttons = []
-    for code, cat in CATEGORIES.items():
-        buttons.append([InlineKeyboardButton(
-            f"{cat['emoji']} {cat['name']}",
-            callback_data=f"cat_{code}"
-        )])
-    
-    buttons.append([InlineKeyboardButton(
-        "📋 KINOLAR RO'YXATI", 
-        callback_data="show_movielist"
-    )])
-    
     await query.edit_message_text(
         f"👋 <b>{user_name}</b>, asosiy menyu:\n\n"
         f"Kategoriyani tanlang:",
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=MAIN_MENU_KEYBOARD,
         parse_mode="HTML"
     )
 
@@ -180,11 +183,9 @@ async def show_help(update: Update, context: CallbackContext):
         "📋 /movielist - barcha kinolar"
     )
     
-    buttons = [[InlineKeyboardButton("🏠 ASOSIY MENYU", callback_data="back_to_main")]]
-    
     await query.edit_message_text(
         help_text,
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=HOME_KEYBOARD,
         parse_mode="HTML"
     )
 
@@ -1,33 +1,42 @@
 import os
+import asyncio
 import logging
 from telegram.ext import (
     ApplicationBuilder,
     CommandHandler,
-    CallbackQueryHandler,
     MessageHandler,
     filters,
     ConversationHandler
 )
 
 # Config
-from config import BOT_TOKEN, ADMIN_ID  # ADMIN_ID int bo'lishi kerak
+from config import BOT_TOKEN, ADMIN_ID, STATS_ROLLUP_INTERVAL, BOT_MODE, WEBHOOK_SECRET, UPDATE_WORKERS, UPDATE_CONCURRENCY, PERSISTENCE_INTERVAL, FILE_VALIDATE_INTERVAL, CACHE_SYNC_INTERVAL  # ADMIN_ID int bo'lishi kerak
 
 # Handlers
 from handlers.start import start_handler
-from handlers.callback import callback_handler
+from handlers.callback import callback_query_handler
 from handlers.movie import search_handler
 from handlers.admin import (
     add_movie_conv,
+    append_parts_conv,
     delete_command,
-    delete_category_handler,
     delete_code_handler,
-    back_to_delete_handler,
     send_command,
-    broadcast_handler,
     stats_command_handler,
+    growth_command_handler,
+    import_command_handler,
+    import_document_handler,
+    export_command_handler,
     cancel_command
 )
 from handlers.error import error_handler
+from broadcast import resume_broadcasts, stop_broadcasts
+from registration import registration_buffer
+from stats import activity, rollup_job
+from update_processor import ChatOrderedUpdateProcessor
+from persistence import DatabasePersistence
+from files import file_registry, validate_files_job
+from sync import cache_sync_job
 
 # Logging
 logging.basicConfig(
@@ -37,40 +46,123 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main():
-    """Botni ishga tushirish"""
+async def post_init(application) -> None:
+    """Bot ishga tushgandan keyin"""
+    await registration_buffer.start()
+    await file_registry.load()
+    await resume_broadcasts(application)  # Tugallanmagan broadcast larni davom ettirish
+
+
+async def post_init_worker(application) -> None:
+    """Qo'shimcha worker lar - broadcast larni faqat 0-worker davom ettiradi"""
+    await registration_buffer.start()
+    await file_registry.load()
+
+
+async def post_stop(application) -> None:
+    """Update lar to'xtagach - broadcast lar checkpoint bilan to'xtatiladi"""
+    await stop_broadcasts()
+
+
+async def post_shutdown(application) -> None:
+    """Bot to'xtaganda - buferdagi ma'lumotlarni yozish"""
+    await registration_buffer.stop()
+    await activity.flush()
+
+
+def build_application(worker: int = 0):
+    """
+    Application va barcha handlerlarni yaratish (har bir worker uchun ham)
     
-    # Bot tokenini tekshirish
-    if not BOT_TOKEN:
-        logger.error("❌ BOT_TOKEN topilmadi!")
-        return
+    Args:
+        worker: Worker raqami (0 - asosiy: broadcast lar va fon tekshiruvlari)
+    """
+    primary = worker == 0
+    activity.worker = worker
+    registration_buffer.worker, registration_buffer.workers = worker, UPDATE_WORKERS
     
-    logger.info(f"✅ Admin ID: {ADMIN_ID} (type: {type(ADMIN_ID)})")  # int ekanligini tekshirish
+    builder = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .persistence(DatabasePersistence(update_interval=PERSISTENCE_INTERVAL))
+        .post_init(post_init if primary else post_init_worker)
+        .post_stop(post_stop)
+        .post_shutdown(post_shutdown)
+    )
     
-    # Application yaratish
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    if UPDATE_CONCURRENCY > 1:
+        # Turli chatlar parallel, bitta chat ichida ketma-ket
+        builder = builder.concurrent_updates(ChatOrderedUpdateProcessor(UPDATE_CONCURRENCY))
+    
+    app = builder.build()
     
     # Handlerlarni qo'shish
     app.add_handler(start_handler)                              # /start
-    app.add_handler(CallbackQueryHandler(callback_handler))     # Tugmalar
+    app.add_handler(callback_query_handler)                      # Tugmalar
+    
+    # Admin suhbatlari matn qidirishdan oldin - aks holda kino nomi
+    # va qism sonlari search_handler ga tushib qoladi
+    app.add_handler(add_movie_conv)                              # /addmovie
+    app.add_handler(append_parts_conv)                           # /addparts
     app.add_handler(search_handler)                              # Matn qidirish
     
     # Admin handlerlar
-    app.add_handler(add_movie_conv)                              # /addmovie
     app.add_handler(delete_command)                              # /delete
-    app.add_handler(delete_category_handler)                     # delete category
     app.add_handler(delete_code_handler)                         # delete code
-    app.add_handler(back_to_delete_handler)                      # back to delete
     app.add_handler(send_command)                                 # /send
-    app.add_handler(broadcast_handler)                            # broadcast confirm
     app.add_handler(stats_command_handler)                        # /stats
+    app.add_handler(growth_command_handler)                       # /growth
+    app.add_handler(import_command_handler)                       # /import
+    app.add_handler(import_document_handler)                      # fayl + "/import" izohi
+    app.add_handler(export_command_handler)                       # /export
     app.add_handler(cancel_command)                               # /cancel
     
+    # Kunlik statistika rollup
+    app.job_queue.run_repeating(rollup_job, interval=STATS_ROLLUP_INTERVAL, first=STATS_ROLLUP_INTERVAL)
+    
+    # Boshqa worker lar o'zgartirgan katalog/fayl keshlarini tozalash
+    if UPDATE_WORKERS > 1:
+        app.job_queue.run_repeating(cache_sync_job, interval=CACHE_SYNC_INTERVAL, first=CACHE_SYNC_INTERVAL)
+    
+    # Fayllarni fonda tekshirish (bir nechta worker bo'lsa faqat 0-worker da)
+    if primary:
+        app.job_queue.run_repeating(validate_files_job, interval=FILE_VALIDATE_INTERVAL, first=60)
+    
     # Error handler
     app.add_error_handler(error_handler)
     
-    logger.info("✅ Bot ishga tushdi...")
-    app.run_polling()
+    return app
+
+
+def main():
+    """Botni ishga tushirish"""
+    
+    # Bot tokenini tekshirish
+    if not BOT_TOKEN:
+        logger.error("❌ BOT_TOKEN topilmadi!")
+        return
+    
+    logger.info(f"✅ Admin ID: {ADMIN_ID} (type: {type(ADMIN_ID)})")  # int ekanligini tekshirish
+    
+    if BOT_MODE == "webhook" and not WEBHOOK_SECRET:
+        logger.error("❌ Webhook rejimi uchun WEBHOOK_SECRET kerak!")
+        return
+    
+    if UPDATE_WORKERS > 1:
+        # Ingress + N ta worker jarayoni (foydalanuvchi ID bo'yicha sharding)
+        from workers import run_sharded
+        run_sharded(build_application, UPDATE_WORKERS)
+        return
+    
+    app = build_application()
+    
+    if BOT_MODE == "webhook":
+        from webhook import run_webhook  # starlette/uvicorn faqat shu rejimda kerak
+        logger.info("✅ Bot ishga tushdi (webhook)...")
+        asyncio.run(run_webhook(app))
+    else:
+        logger.info("✅ Bot ishga tushdi...")
+        app.run_polling()
 
 
 if __name__ == "__main__":
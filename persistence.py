@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import logging
+import zlib
+from telegram.ext import BasePersistence, PersistenceInput
+from database import async_db
+
+logger = logging.getLogger(__name__)
+
+USER, CHAT, BOT, CONVERSATION = "user", "chat", "bot", "conversation"
+
+# Shundan uzun JSON zlib bilan siqiladi
+COMPRESS_MIN_BYTES = 256
+
+
+# ==================== SERIALIZATSIYA ====================
+def dumps(obj) -> bytes:
+    """
+    Ixcham format: 1 bayt sarlavha + JSON
+
+    b"j" - oddiy JSON, b"z" - zlib bilan siqilgan JSON. Kichik
+    user_data lar siqilmaydi (zlib sarlavhasi foyda bermaydi).
+    """
+    raw = json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return b"z" + zlib.compress(raw, 6)
+    return b"j" + raw
+
+
+def loads(data: bytes):
+    """dumps() teskarisi"""
+    body = data[1:]
+    if data[:1] == b"z":
+        body = zlib.decompress(body)
+    return json.loads(body)
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+class DatabasePersistence(BasePersistence):
+    """
+    user_data, chat_data, bot_data va suhbat holatlarini bazada saqlash
+
+    PTB o'zgargan bo'lishi mumkin bo'lgan ma'lumotlarni har `update_interval`
+    soniyada beradi. Bu yerda ular serializatsiya qilinib oxirgi saqlangan
+    nusxa bilan solishtiriladi (dirty tracking) - faqat haqiqatan
+    o'zgarganlari navbatga qo'yiladi va bitta tranzaksiyada yoziladi.
+    Bo'sh user_data/chat_data qator sifatida saqlanmaydi.
+
+    Har bir foydalanuvchi alohida qator bo'lgani uchun bir nechta bot
+    nusxasi (worker) bitta bazadan foydalanishi mumkin.
+
+    Args:
+        update_interval: PTB ning persistence ni yangilash oralig'i (soniya)
+        flush_delay: Bitta sikldagi o'zgarishlarni yig'ish uchun kutish (soniya)
+    """
+
+    def __init__(self, update_interval: float = 60, flush_delay: float = 0.1):
+        super().__init__(
+            store_data=PersistenceInput(callback_data=False),
+            update_interval=update_interval
+        )
+        self.flush_delay = flush_delay
+        self.pending = {}      # (kind, key) -> bytes yoki None (o'chirish)
+        self.digests = {}      # (kind, key) -> oxirgi yozilgan nusxa xeshi
+        self.conversations = None
+        self._flush_task = None
+        self._lock = asyncio.Lock()
+
+    # ==================== YUKLASH ====================
+    async def _load(self, kind: str) -> dict:
+        rows = await async_db.load_bot_state(kind)
+        result = {}
+        for key, data in rows.items():
+            try:
+                result[key] = loads(data)
+            except (ValueError, zlib.error) as e:
+                logger.warning(f"⚠️ Buzilgan holat o'tkazib yuborildi ({kind}:{key}): {e}")
+                continue
+            self.digests[(kind, key)] = _digest(data)
+        return result
+
+    async def get_user_data(self) -> dict:
+        return {int(key): value for key, value in (await self._load(USER)).items()}
+
+    async def get_chat_data(self) -> dict:
+        return {int(key): value for key, value in (await self._load(CHAT)).items()}
+
+    async def get_bot_data(self) -> dict:
+        return (await self._load(BOT)).get("bot", {})
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        if self.conversations is None:
+            self.conversations = await self._load(CONVERSATION)
+
+        prefix = f"{name}:"
+        return {
+            tuple(int(part) for part in key[len(prefix):].split(",")): state
+            for key, state in self.conversations.items()
+            if key.startswith(prefix)
+        }
+
+    # ==================== YOZISH (NAVBATGA) ====================
+    def _stage(self, kind: str, key: str, value) -> None:
+        """Qiymatni serializatsiya qilib, o'zgargan bo'lsa navbatga qo'yish"""
+        data = dumps(value) if value not in (None, {}) else None
+        digest = _digest(data) if data is not None else None
+
+        if self.digests.get((kind, key)) == digest:
+            self.pending.pop((kind, key), None)
+            return
+
+        self.pending[(kind, key)] = data
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Bitta persistence siklidagi barcha update_* chaqiruvlari yig'iladi
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._stage(USER, str(user_id), data)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        self._stage(CHAT, str(chat_id), data)
+
+    async def update_bot_data(self, data: dict) -> None:
+        self._stage(BOT, "bot", data)
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def update_conversation(self, name: str, key: tuple, new_state) -> None:
+        self._stage(CONVERSATION, f"{name}:{','.join(str(part) for part in key)}", new_state)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._stage(USER, str(user_id), None)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._stage(CHAT, str(chat_id), None)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    async def flush(self) -> None:
+        """Navbatdagi barcha o'zgarishlarni bitta tranzaksiyada yozish"""
+        async with self._lock:
+            if not self.pending:
+                return
+
+            batch, self.pending = self.pending, {}
+            rows = [(kind, key, data) for (kind, key), data in batch.items()]
+
+            if await async_db.save_bot_state(rows):
+                for (kind, key), data in batch.items():
+                    if data is None:
+                        self.digests.pop((kind, key), None)
+                    else:
+                        self.digests[(kind, key)] = _digest(data)
+                logger.debug(f"💾 {len(rows)} ta holat yozildi")
+            else:
+                # Yozilmadi - keyingi siklda qayta uriniladi (yangilari ustun)
+                self.pending = {**batch, **self.pending}
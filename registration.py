@@ -0,0 +1,155 @@
+import asyncio
+import logging
+from datetime import datetime
+from config import USER_FLUSH_INTERVAL_MS, USER_FLUSH_BATCH
+from database import async_db
+
+logger = logging.getLogger(__name__)
+
+
+class UserRegistrationBuffer:
+    """
+    Yangi foydalanuvchilarni partiyalab yozuvchi bufer (write-behind)
+
+    /start da foydalanuvchi yangimi yoki yo'qligi xotiradagi to'plamdan
+    aniqlanadi, yozuv esa navbatga qo'yiladi. Ma'lum, faol va
+    username/ismi o'zgarmagan foydalanuvchi uchun hech narsa yozilmaydi. Navbat har
+    `flush_interval` soniyada yoki `max_batch` ta yig'ilganda bitta
+    ko'p qatorli INSERT bilan yoziladi.
+
+    Bir nechta worker bo'lsa har biri faqat o'ziga tushadigan
+    (user_id % workers == worker) foydalanuvchilarni xotirada saqlaydi.
+    Broadcast boshqa worker da nofaol qilgan foydalanuvchilar
+    refresh_inactive() orqali olinadi (sync.CacheSync).
+
+    Args:
+        flush_interval: Yozish oralig'i (soniya)
+        max_batch: Shuncha yozuv yig'ilsa darhol yoziladi
+        worker: Shu jarayonning worker raqami
+        workers: Worker lar soni
+    """
+
+    def __init__(self, flush_interval: float, max_batch: int, worker: int = 0, workers: int = 1):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.worker = worker
+        self.workers = workers
+        self.known = {}          # user_id -> oxirgi yozilgan (username, first_name)
+        self.inactive = set()    # Botni bloklagan foydalanuvchilar
+        self.pending = {}        # user_id -> yoziladigan qator
+        self.ready = False
+        self._wakeup = asyncio.Event()
+        self._flusher = None
+
+    def owns(self, user_id) -> bool:
+        """Foydalanuvchi update lari shu worker ga tushadimi (workers.shard_key bilan bir xil)"""
+        return self.workers <= 1 or int(user_id) % self.workers == self.worker
+
+    async def start(self) -> None:
+        """Mavjud foydalanuvchilarni yuklash va fon yozuvchini ishga tushirish"""
+        after_id = 0
+        while True:
+            batch = await async_db.get_user_state_batch(after_id)
+            if not batch:
+                break
+            for _, user_id, is_active, username, first_name in batch:
+                if not self.owns(user_id):
+                    continue
+                self.known[user_id] = (username, first_name)
+                if not is_active:
+                    self.inactive.add(user_id)
+            after_id = batch[-1][0]
+
+        self.ready = True
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info(f"✅ Foydalanuvchilar buferi tayyor ({len(self.known)} ta)")
+
+    async def register(self, user_id: str, username: str = None, first_name: str = None) -> bool:
+        """
+        Foydalanuvchini ro'yxatdan o'tkazish
+
+        Returns:
+            bool: Foydalanuvchi yangi bo'lsa True
+        """
+        if not self.ready:
+            # Bufer hali yuklanmagan - to'g'ridan-to'g'ri bazaga
+            return await async_db.add_user(user_id, username, first_name)
+
+        profile = (username, first_name)
+        if self.known.get(user_id) == profile and user_id not in self.inactive:
+            return False
+
+        is_new = user_id not in self.known
+        self.known[user_id] = profile
+        self.inactive.discard(user_id)
+
+        # Nofaol yoki ismini o'zgartirgan foydalanuvchi ham upsert orqali yangilanadi
+        self.pending[user_id] = {
+            'user_id': user_id,
+            'username': username,
+            'first_name': first_name,
+            'joined_at': datetime.now()
+        }
+        if len(self.pending) >= self.max_batch:
+            self._wakeup.set()
+
+        return is_new
+
+    def mark_inactive(self, user_ids: list) -> None:
+        """Broadcast da o'lik deb topilgan foydalanuvchilarni belgilash"""
+        self.inactive.update(str(u) for u in user_ids if self.owns(u))
+
+    async def refresh_inactive(self, since: datetime) -> int:
+        """
+        Boshqa jarayonlar `since` dan keyin nofaol qilgan foydalanuvchilarni olish
+
+        Aks holda ular keyingi /start da qisqa yo'ldan o'tib, qayta
+        faollashtirilmay qoladi.
+        """
+        user_ids = [u for u in await async_db.get_deactivated_user_ids(since) if self.owns(u)]
+        self.inactive.update(user_ids)
+        return len(user_ids)
+
+    async def flush(self) -> int:
+        """Navbatdagi barcha yozuvlarni bazaga yozish"""
+        if not self.pending:
+            return 0
+
+        rows = list(self.pending.values())
+        self.pending = {}
+
+        written = await async_db.add_users_bulk(rows)
+        if not written:
+            # Yozilmadi - keyingi safar qayta urinib ko'riladi
+            for row in rows:
+                self.pending.setdefault(row['user_id'], row)
+        return written
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Foydalanuvchilar buferini yozishda xatolik: {e}")
+
+    async def stop(self) -> None:
+        """Fon yozuvchini to'xtatish va qolganini yozish"""
+        if self._flusher:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+        await self.flush()
+        self.ready = False
+
+
+registration_buffer = UserRegistrationBuffer(
+    flush_interval=USER_FLUSH_INTERVAL_MS / 1000,
+    max_batch=USER_FLUSH_BATCH
+)
@@ -0,0 +1,97 @@
+import logging
+from datetime import date
+from database import async_db
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityCounters:
+    """
+    Kunlik faollik hisoblagichlari (xotirada)
+
+    Handlerlar har bir qidiruv va qism ko'rishda faqat xotiradagi sonni
+    oshiradi; JobQueue dagi rollup ularni vaqti-vaqti bilan daily_stats
+    jadvaliga qo'shib qo'yadi.
+
+    Bir nechta worker bo'lsa har biri faqat o'z shard idagi
+    foydalanuvchilarni ko'radi - faollar soni `worker` raqami bilan
+    alohida yoziladi va bazada qo'shiladi.
+    """
+
+    def __init__(self, worker: int = 0):
+        self.worker = worker
+        self.days = {}
+
+    def _today(self) -> dict:
+        return self.days.setdefault(date.today(), {
+            'searches': 0,
+            'part_plays': 0,
+            'active': set()
+        })
+
+    def record_active(self, user_id: int) -> None:
+        """Foydalanuvchi bugun faol bo'ldi"""
+        self._today()['active'].add(user_id)
+
+    def record_search(self, user_id: int) -> None:
+        """Qidiruv"""
+        counters = self._today()
+        counters['searches'] += 1
+        counters['active'].add(user_id)
+
+    def record_part_play(self, user_id: int) -> None:
+        """Serial qismi yuborildi"""
+        counters = self._today()
+        counters['part_plays'] += 1
+        counters['active'].add(user_id)
+
+    async def flush(self) -> None:
+        """Yig'ilgan deltalarni daily_stats ga yozish"""
+        today = date.today()
+
+        for day, counters in list(self.days.items()):
+            searches, part_plays = counters['searches'], counters['part_plays']
+            counters['searches'] = counters['part_plays'] = 0
+
+            ok = await async_db.rollup_daily_stats(
+                day,
+                searches=searches,
+                part_plays=part_plays,
+                active_users=len(counters['active']),
+                worker=self.worker
+            )
+
+            if not ok:
+                # Yozilmadi - deltalar keyingi rollup ga qoladi
+                counters['searches'] += searches
+                counters['part_plays'] += part_plays
+            elif day != today:
+                del self.days[day]
+
+
+activity = ActivityCounters()
+
+
+async def rollup_job(context) -> None:
+    """JobQueue uchun: statistikani daily_stats ga yig'ish"""
+    await activity.flush()
+    logger.info("📊 Kunlik statistika yangilandi")
+
+
+def render_chart(rows: list, key: str, width: int = 20) -> str:
+    """
+    Kunlik qiymatlardan matnli grafik chizish
+
+    Args:
+        rows: get_daily_stats() natijasi
+        key: Qaysi ustun (masalan: 'new_users')
+        width: Eng katta ustun uzunligi (belgi)
+    """
+    peak = max((r[key] for r in rows), default=0) or 1
+    lines = []
+
+    for r in rows:
+        bar = "█" * round(r[key] / peak * width)
+        lines.append(f"<code>{r['day'].strftime('%m-%d')} {bar:<{width}} {r[key]}</code>")
+
+    return "\n".join(lines)
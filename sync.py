@@ -0,0 +1,61 @@
+import logging
+from datetime import datetime, timedelta
+from database import db, async_db, SYNC_CATALOG, SYNC_FILES, SYNC_USERS
+from files import file_registry
+from registration import registration_buffer
+from handlers.keyboards import part_keyboard
+
+logger = logging.getLogger(__name__)
+
+
+class CacheSync:
+    """
+    Bir nechta worker jarayoni keshlarini moslash
+
+    Har bir jarayonning o'z movie_cache, count_cache, overview_cache,
+    qism klaviaturalari keshi, yaroqsiz fayllar va nofaol foydalanuvchilar
+    ro'yxati bor. Katalog, fayl yoki foydalanuvchi holati o'zgarganda
+    bazadagi versiya oshiriladi (Database.bump_version); bu yerda
+    versiyalar vaqti-vaqti bilan tekshiriladi va o'zgargan bo'lsa
+    keshlar tozalanadi/qayta yuklanadi.
+
+    Birinchi tekshiruvda ham tozalanadi - ishga tushish va birinchi
+    tekshiruv orasidagi o'zgarishlar o'tkazib yuborilmaydi.
+    """
+
+    # Nofaol qilinganlarni qidirishda ortga qo'shimcha oraliq (soat/commit farqi)
+    USERS_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self):
+        self.versions = {}
+        # Import paytida - registration_buffer yuklanishidan oldin
+        self.checked_at = datetime.now()
+
+    async def check(self) -> None:
+        now = datetime.now()
+        versions = await async_db.get_sync_versions()
+        if not versions:
+            return
+
+        if versions.get(SYNC_CATALOG) != self.versions.get(SYNC_CATALOG):
+            db.clear_catalog_cache()
+            part_keyboard.cache_clear()
+            logger.debug(f"🔄 Katalog keshi yangilandi (v{versions.get(SYNC_CATALOG)})")
+
+        if versions.get(SYNC_FILES) != self.versions.get(SYNC_FILES):
+            await file_registry.load()
+
+        if versions.get(SYNC_USERS) != self.versions.get(SYNC_USERS) and registration_buffer.ready:
+            # Broadcast boshqa worker da nofaol qilgan foydalanuvchilar
+            await registration_buffer.refresh_inactive(self.checked_at - self.USERS_OVERLAP)
+
+        self.versions = versions
+        self.checked_at = now
+
+
+cache_sync = CacheSync()
+
+
+async def cache_sync_job(context) -> None:
+    """JobQueue uchun: boshqa worker lar o'zgartirgan keshlarni tozalash"""
+    await cache_sync.check()
@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# database.py import paytida ulanadi - testlar vaqtinchalik SQLite bazada ishlaydi
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="kinobot-"), "test.db")
+
+
+@pytest.fixture
+def db():
+    """Bo'sh baza va keshlar"""
+    from database import Base, db as database
+
+    with database.engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+    database.movie_cache.clear()
+    database.count_cache.clear()
+    database.overview_cache.clear()
+    return database
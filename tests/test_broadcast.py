@@ -0,0 +1,99 @@
+import asyncio
+import random
+from telegram.error import Forbidden
+from broadcast import Broadcaster
+
+
+class FakeBot:
+    """send_message ni tasodifiy kechikish bilan taqlid qiladi"""
+
+    def __init__(self, blocked=(), delay: float = 0.002):
+        self.blocked = set(blocked)
+        self.delay = delay
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(random.random() * self.delay)
+        if chat_id in self.blocked:
+            raise Forbidden("bot was blocked by the user")
+        self.sent.append(chat_id)
+
+
+async def _batches(rows, size: int = 7):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _run(broadcaster, rows, checkpoints, **kwargs):
+    async def on_checkpoint(cursor, stats):
+        checkpoints.append((cursor, stats))
+
+    return broadcaster.run(_batches(rows), "salom", on_checkpoint=on_checkpoint, **kwargs)
+
+
+def test_cursor_is_highest_contiguous_row(monkeypatch):
+    pruned = []
+
+    async def fake_prune(self):
+        pruned.extend(self.dead['blocked'])
+        self.dead['blocked'].clear()
+
+    monkeypatch.setattr(Broadcaster, "_prune_dead", fake_prune)
+    rows = [(row_id, 1000 + row_id) for row_id in range(1, 101)]
+    bot = FakeBot(blocked={1005})
+    broadcaster = Broadcaster(bot, rate=10_000, concurrency=8, checkpoint_every=10)
+    checkpoints = []
+
+    stats = asyncio.run(_run(broadcaster, rows, checkpoints))
+
+    cursors = [cursor for cursor, _ in checkpoints]
+    assert stats['sent'] == 99 and stats['blocked'] == 1
+    assert pruned == [1005]
+    assert cursors == sorted(cursors)
+    assert len(cursors) >= 5
+    assert cursors[-1] == broadcaster.cursor == 100
+    assert checkpoints[-1][1] == {'sent': 99, 'failed': 1}
+    # Hisoblagichlar aynan cursor gacha bo'lganlarni sanaydi
+    for cursor, saved in checkpoints:
+        assert saved['sent'] + saved['failed'] == cursor
+
+
+def test_cancel_checkpoints_and_resume_skips_sent(monkeypatch):
+    async def fake_prune(self):
+        pass
+
+    monkeypatch.setattr(Broadcaster, "_prune_dead", fake_prune)
+    rows = [(row_id, row_id) for row_id in range(1, 201)]
+    bot = FakeBot()
+    checkpoints = []
+
+    async def cancel_midway():
+        broadcaster = Broadcaster(bot, rate=10_000, concurrency=8, checkpoint_every=5)
+        task = asyncio.create_task(_run(broadcaster, rows, checkpoints))
+        while len(bot.sent) < 60:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return broadcaster
+
+    broadcaster = asyncio.run(cancel_midway())
+    cursor, saved = checkpoints[-1]
+
+    # Saqlangan cursor gacha hammasi yuborilgan, undan keyin yuborilganlar bir nechta
+    assert cursor == broadcaster.cursor
+    assert set(range(1, cursor + 1)) <= set(bot.sent)
+    assert len([c for c in bot.sent if c > cursor]) < broadcaster.concurrency
+    assert saved == {'sent': cursor, 'failed': 0}
+
+    # run_broadcast_job dagi kabi saqlangan holatdan davom ettirish
+    resumed = Broadcaster(bot, rate=10_000, concurrency=8, checkpoint_every=5)
+    resumed.cursor = cursor
+    resumed.committed.update(saved)
+    resumed.stats.update(saved)
+    resumed_checkpoints = []
+    stats = asyncio.run(_run(resumed, [r for r in rows if r[0] > cursor], resumed_checkpoints))
+
+    assert set(bot.sent) == set(range(1, 201))
+    assert stats['sent'] == 200
+    assert resumed_checkpoints[-1] == (200, {'sent': 200, 'failed': 0})
+    assert len(bot.sent) - 200 < broadcaster.concurrency
@@ -0,0 +1,66 @@
+import io
+import pytest
+from catalog_io import export_stream, import_stream
+
+
+def _fill(db):
+    assert db.add_movie(code=1, name="Shum bola", category="kino", description="Komediya",
+                        file_id="BAACAgIAAx0", file_type="video")
+    assert db.add_movie(code=2, name="Hujjatli", category="kino", description="",
+                        file_id="BQACAgIAAx0", file_type="document")
+    assert db.add_serial(code=3, name="O'tkan kunlar", category="serial", description="Serial", parts=[
+        {'name': "1-qism", 'file_id': "BAACAgIAAx1", 'file_type': "video"},
+        {'name': "Final", 'file_id': "BQACAgIAAx2", 'file_type': "document"},
+    ])
+
+
+def _export(fmt: str) -> str:
+    stream = io.StringIO(newline="")
+    export_stream(stream, fmt)
+    return stream.getvalue()
+
+
+def _clear(db):
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM movie_parts")
+        conn.exec_driver_sql("DELETE FROM movies")
+    db.clear_catalog_cache()
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_export_import_round_trip(db, fmt):
+    _fill(db)
+    before = db.get_catalog_batch()
+    exported = _export(fmt)
+
+    _clear(db)
+    report = import_stream(io.StringIO(exported, newline=""), fmt)
+
+    assert report['invalid'] == 0 and report['errors'] == []
+    assert report['inserted'] == 3
+    assert db.get_catalog_batch() == before
+    assert _export(fmt) == exported
+
+
+def test_reimport_skips_or_updates_existing(db):
+    _fill(db)
+    exported = _export("jsonl")
+
+    assert import_stream(io.StringIO(exported), "jsonl")['skipped'] == 3
+
+    report = import_stream(io.StringIO(exported.replace("Shum bola", "Shum bola 2")), "jsonl", update_existing=True)
+    assert report['updated'] == 3
+    assert db.get_movie_by_code(1)['name'] == "Shum bola 2"
+
+
+def test_csv_parts_accept_pipe_separated_file_ids(db):
+    csv_text = (
+        "code,name,category,description,file_id,file_type,parts\n"
+        "5,Serial,serial,,,serial,BAACAgIAAx1|BAACAgIAAx2\n"
+    )
+
+    report = import_stream(io.StringIO(csv_text, newline=""), "csv")
+
+    assert report['inserted'] == 1
+    (movie,) = db.get_catalog_batch()
+    assert [(p['name'], p['file_type']) for p in movie['parts']] == [("1-qism", "video"), ("2-qism", "video")]
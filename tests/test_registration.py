@@ -0,0 +1,61 @@
+import asyncio
+from registration import UserRegistrationBuffer
+
+
+def _user(db, user_id: str) -> tuple:
+    with db.engine.connect() as conn:
+        return tuple(conn.exec_driver_sql(
+            "SELECT username, first_name, is_active FROM users WHERE user_id = ?", (user_id,)
+        ).one())
+
+
+def test_known_user_profile_change_is_written(db):
+    assert db.add_user("42", "old", "Old")
+
+    async def scenario():
+        buffer = UserRegistrationBuffer(flush_interval=60, max_batch=100)
+        await buffer.start()
+        try:
+            assert await buffer.register("42", "old", "Old") is False
+            assert not buffer.pending
+
+            assert await buffer.register("42", "new_name", "New Name") is False
+            await buffer.flush()
+        finally:
+            await buffer.stop()
+
+    asyncio.run(scenario())
+
+    assert _user(db, "42") == ("new_name", "New Name", True)
+
+
+def test_worker_loads_own_shard_and_learns_remote_deactivation(db, monkeypatch):
+    import sync
+    for user_id in ("10", "11", "12", "13"):
+        assert db.add_user(user_id, f"u{user_id}", "U")
+
+    async def scenario():
+        # Worker 1/2: faqat toq user_id lar (shard_key % 2 == 1)
+        buffer = UserRegistrationBuffer(flush_interval=60, max_batch=100, worker=1, workers=2)
+        monkeypatch.setattr(sync, "registration_buffer", buffer)
+        cache_sync = sync.CacheSync()
+        await buffer.start()
+        try:
+            assert set(buffer.known) == {"11", "13"}
+            await cache_sync.check()
+
+            # Broadcast boshqa worker da nofaol qildi
+            db.deactivate_users(["11", "12"], "blocked")
+            await cache_sync.check()
+            assert buffer.inactive == {"11"}
+
+            # /start qisqa yo'ldan o'tmaydi - qayta faollashtiriladi
+            assert await buffer.register("11", "u11", "U") is False
+            await buffer.flush()
+        finally:
+            await buffer.stop()
+
+    asyncio.run(scenario())
+
+    assert _user(db, "11") == ("u11", "U", True)
+    assert not _user(db, "12")[2]
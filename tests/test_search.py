@@ -0,0 +1,58 @@
+from untils.search import normalize_name, split_terms
+
+
+def test_normalize_latin_and_cyrillic_variants():
+    expected = "otkan kunlar"
+    assert normalize_name("O'tkan kunlar") == expected
+    assert normalize_name("Oʻtkan  Kunlar!") == expected
+    assert normalize_name("Ўткан кунлар") == expected
+
+
+def test_split_terms():
+    assert split_terms("  Shum-bola (1977) ") == ["shum", "bola", "1977"]
+    assert split_terms("!!!") == []
+
+
+def _add(db, code, name, category="kino"):
+    assert db.add_movie(code=code, name=name, category=category, description="", file_id=f"file{code}")
+
+
+def test_search_ranks_exact_then_prefix_then_shorter(db):
+    _add(db, 1, "Qasoskorlar: Final")
+    _add(db, 2, "Qasoskorlar")
+    _add(db, 3, "Yangi qasoskorlar")
+    _add(db, 4, "Qasoskorlar 2")
+    _add(db, 5, "Boshqa kino")
+
+    codes = [m.code for m in db.search_movies_by_name("qasoskorlar")]
+
+    assert codes == [2, 4, 1, 3]
+
+
+def test_search_matches_all_terms_across_scripts(db):
+    _add(db, 1, "Ўткан кунлар")
+    _add(db, 2, "O'tkan zamon")
+    _add(db, 3, "Kunlar", category="serial")
+
+    assert [m.code for m in db.search_movies_by_name("otkan kunlar")] == [1]
+    assert [m.code for m in db.search_movies_by_name("Oʻtkan")] == [2, 1]
+    assert [m.code for m in db.search_movies_by_name("kunlar", category="serial")] == [3]
+
+
+def test_search_ignores_punctuation_and_wildcards(db):
+    _add(db, 1, "100% kino")
+    _add(db, 2, "1000 kino")
+
+    assert [m.code for m in db.search_movies_by_name("100%")] == [1, 2]
+    assert db.search_movies_by_name("%") == []
+
+
+def test_add_user_upsert_without_on_conflict(db):
+    assert db.add_user("42", "ali", "Ali") is True
+    assert db.add_user("42", "ali", "Ali") is False
+
+    db.deactivate_users(["42"], "blocked")
+    assert db.get_user_count(active_only=True) == 0
+
+    assert db.add_user("42", "ali_new", "Ali") is False
+    assert db.get_user_count(active_only=True) == 1
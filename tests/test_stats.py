@@ -0,0 +1,25 @@
+import asyncio
+from datetime import date
+from stats import ActivityCounters
+
+
+def test_rollup_sums_active_users_across_workers(db):
+    today = date.today()
+    workers = [ActivityCounters(worker=i) for i in range(3)]
+
+    # Har bir worker o'z shard idagi foydalanuvchilarni ko'radi
+    for user_id in range(30):
+        workers[user_id % 3].record_search(user_id)
+    workers[1].record_part_play(1)
+
+    for counters in workers:
+        asyncio.run(counters.flush())
+    # Takroriy rollup faollarni ikki marta sanamaydi, deltalar esa qo'shiladi
+    workers[0].record_search(0)
+    asyncio.run(workers[0].flush())
+
+    (row,) = db.get_daily_stats(days=1)
+    assert row['day'] == today
+    assert row['active_users'] == 30
+    assert row['searches'] == 31
+    assert row['part_plays'] == 1
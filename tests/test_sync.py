@@ -0,0 +1,36 @@
+import asyncio
+from database import SYNC_CATALOG
+from files import file_registry
+from sync import CacheSync
+
+
+def test_catalog_change_in_other_process_clears_cache(db):
+    assert db.add_movie(code=7, name="Kino", category="kino", description="", file_id="f7")
+    sync = CacheSync()
+    asyncio.run(sync.check())
+
+    assert db.get_movie_by_code(7)['name'] == "Kino"
+    assert db.count_movies() == 1
+
+    # Boshqa worker kinoni o'chirdi - bu jarayon keshi bilmaydi
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM movies WHERE code = 7")
+    db.bump_version(SYNC_CATALOG)
+    assert db.get_movie_by_code(7) is not None
+
+    asyncio.run(sync.check())
+
+    assert db.get_movie_by_code(7) is None
+    assert db.count_movies() == 0
+
+
+def test_dead_files_reloaded_after_other_process_marks_them(db):
+    sync = CacheSync()
+    asyncio.run(sync.check())
+    assert not file_registry.is_dead("dead-id")
+
+    db.record_files([{'file_id': "dead-id", 'kind': None, 'file_size': None, 'duration': None,
+                      'mime_type': None, 'status': "dead", 'error': "wrong file identifier"}])
+    asyncio.run(sync.check())
+
+    assert file_registry.is_dead("dead-id")
@@ -0,0 +1,114 @@
+import multiprocessing
+import queue
+from workers import STOP, ShardedDispatcher, shard_key
+
+
+def message(update_id: int, user_id: int, chat_id: int = None) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+            "chat": {"id": chat_id or user_id, "type": "private"},
+            "text": "kino"
+        }
+    }
+
+
+def callback_query(update_id: int, user_id: int, chat_id: int = None) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+            "chat_instance": "1",
+            "data": "home_menu",
+            "message": {"message_id": 1, "date": 0, "chat": {"id": chat_id or user_id, "type": "private"}}
+        }
+    }
+
+
+def drain(q) -> list:
+    items = []
+    while True:
+        try:
+            items.append(q.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def test_shard_key_uses_sender_for_messages_and_callbacks():
+    assert shard_key(message(1, 42)) == 42
+    assert shard_key(callback_query(2, 42)) == 42
+    # Guruhda ham foydalanuvchi bo'yicha (chat emas)
+    assert shard_key(message(3, 42, chat_id=-100500)) == 42
+    assert shard_key(callback_query(4, 42, chat_id=-100500)) == 42
+    # Foydalanuvchisiz update - chat, u ham bo'lmasa update_id
+    assert shard_key({"update_id": 5, "channel_post": {"chat": {"id": -7}}}) == -7
+    assert shard_key({"update_id": 6}) == 6
+
+
+def test_user_updates_stay_on_one_shard_in_order():
+    queues = [queue.Queue() for _ in range(4)]
+    dispatcher = ShardedDispatcher(queues)
+
+    updates = []
+    for update_id in range(200):
+        user_id = 1000 + update_id % 13
+        make = message if update_id % 2 else callback_query
+        updates.append(make(update_id, user_id))
+
+    shards = {}
+    for data in updates:
+        index = dispatcher.put(data)
+        user_id = shard_key(data)
+        assert shards.setdefault(user_id, index) == index
+
+    assert sum(dispatcher.dispatched) == len(updates)
+    assert len(set(shards.values())) > 1
+
+    for index, q in enumerate(queues):
+        received = drain(q)
+        assert len(received) == dispatcher.dispatched[index]
+        for user_id in {shard_key(d) for d in received}:
+            ids = [d["update_id"] for d in received if shard_key(d) == user_id]
+            assert ids == sorted(ids)
+            assert shards[user_id] == index
+
+
+def test_stop_and_status_with_multiprocessing_queues():
+    context = multiprocessing.get_context("spawn")
+    queues = [context.Queue() for _ in range(2)]
+    dispatcher = ShardedDispatcher(queues)
+
+    index = dispatcher.put(message(1, 7))
+    dispatcher.stop()
+
+    assert queues[index].get(timeout=5)["update_id"] == 1
+    assert all(q.get(timeout=5) is STOP for q in queues)
+    assert dispatcher.status() == {'status': "ok", 'workers': 2, 'dispatched': dispatcher.dispatched}
+
+
+def test_sigterm_stops_ingress_cleanly():
+    import asyncio
+    import os
+    import signal
+    from workers import run_ingress
+
+    started = []
+
+    async def ingress(dispatcher):
+        started.append(dispatcher)
+        await asyncio.sleep(60)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, os.kill, os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(run_ingress(ingress, "dispatcher"), timeout=5)
+
+    asyncio.run(scenario())
+
+    assert started == ["dispatcher"]
+    # Ishlov beruvchi olib tashlangan - standart SIGTERM qaytgan
+    assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
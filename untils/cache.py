@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """
+    Hajmi cheklangan, thread-safe LRU kesh
+
+    Database metodlari executor thread larida ishlagani uchun barcha
+    amallar lock ostida bajariladi.
+
+    Bazadan o'qish va keshga yozish orasida invalidate()/clear()
+    chaqirilsa eski qiymat keshga qaytib tushmasligi uchun o'qishdan
+    oldin generation() olinadi va set() ga beriladi - o'rtada kalit
+    tozalangan bo'lsa qiymat saqlanmaydi.
+
+    Args:
+        maxsize: Keshdagi elementlarning maksimal soni
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._versions = {}  # kalit -> invalidate() lar soni
+        self._epoch = 0      # clear() lar soni
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Qiymatni olish (topilsa oxirgi ishlatilgan deb belgilanadi)"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def generation(self, key: Hashable) -> tuple:
+        """Kalitning joriy avlodi (bazadan o'qishdan oldin olinadi)"""
+        with self._lock:
+            return self._epoch, self._versions.get(key, 0)
+
+    def set(self, key: Hashable, value: Any, generation: tuple = None) -> None:
+        """
+        Qiymatni saqlash (limitdan oshsa eng eskisi chiqariladi)
+
+        Args:
+            generation: generation() natijasi - shundan keyin kalit
+                tozalangan bo'lsa qiymat eskirgan va saqlanmaydi
+        """
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._versions.get(key, 0)):
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Bitta kalitni o'chirish"""
+        with self._lock:
+            self._data.pop(key, None)
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def clear(self) -> None:
+        """Keshni to'liq tozalash"""
+        with self._lock:
+            self._data.clear()
+            self._versions.clear()
+            self._epoch += 1
+
+    def stats(self) -> dict:
+        """Hit/miss statistikasi"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+
+class TTLCache:
+    """
+    Har bir element ma'lum vaqt (soniya) yashaydigan kesh
+
+    Args:
+        ttl: Element yashash muddati (soniya)
+        maxsize: Keshdagi elementlarning maksimal soni
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 100_000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Muddati o'tmagan qiymatni olish"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Qiymatni saqlash"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Bitta kalitni o'chirish"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Keshni to'liq tozalash"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,73 @@
+import base64
+import binascii
+import struct
+from functools import lru_cache
+from typing import Optional
+
+# Bot API file_id ichidagi fayl turi (TDLib FileType tartibida)
+FILE_TYPES = {
+    0: "thumbnail",
+    1: "chat_photo",
+    2: "photo",
+    3: "voice",
+    4: "video",
+    5: "document",
+    6: "encrypted",
+    7: "temp",
+    8: "sticker",
+    9: "audio",
+    10: "animation",
+    11: "encrypted_thumbnail",
+    12: "wallpaper",
+    13: "video_note",
+    14: "secure_raw",
+    15: "secure",
+    16: "background",
+    17: "document",  # document_as_file
+}
+
+WEB_LOCATION_FLAG = 1 << 24
+FILE_REFERENCE_FLAG = 1 << 25
+
+
+def _rle_decode(data: bytes) -> bytes:
+    """file_id dagi nol baytlar "0x00, soni" ko'rinishida siqilgan"""
+    out = bytearray()
+    zero = False
+    for byte in data:
+        if zero:
+            out.extend(b"\x00" * byte)
+            zero = False
+        elif byte == 0:
+            zero = True
+        else:
+            out.append(byte)
+    return bytes(out)
+
+
+@lru_cache(maxsize=65536)
+def decode_file_type(file_id: str) -> Optional[str]:
+    """
+    file_id dan fayl turini aniqlash (tarmoq so'rovisiz)
+
+    file_id - base64url + RLE bilan kodlangan struktura, birinchi 4 bayti
+    (little-endian) fayl turi va bayroqlar. Shu tur bo'yicha to'g'ri
+    send_* metodi tanlanadi: "video", "document", "animation", ...
+
+    Returns:
+        str yoki None (file_id o'qib bo'lmasa)
+    """
+    if not file_id:
+        return None
+
+    try:
+        raw = base64.urlsafe_b64decode(file_id + "=" * (-len(file_id) % 4))
+    except (binascii.Error, ValueError):
+        return None
+
+    data = _rle_decode(raw)
+    if len(data) < 4:
+        return None
+
+    type_id = struct.unpack("<i", data[:4])[0] & ~(WEB_LOCATION_FLAG | FILE_REFERENCE_FLAG)
+    return FILE_TYPES.get(type_id)
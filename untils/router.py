@@ -0,0 +1,187 @@
+import logging
+import re
+import time
+from typing import Callable, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Telegram callback_data 64 baytdan oshmaydi
+MAX_CALLBACK_LENGTH = 64
+
+
+class BadCallbackData(ValueError):
+    """Callback argumentlari noto'g'ri (soxta yoki eskirgan tugma)"""
+
+
+# ==================== ARGUMENT PARSERLARI ====================
+def positive_int(value: str) -> int:
+    """Musbat butun son ("12" -> 12); "-1", "1.5", " 3" rad etiladi"""
+    if not value.isdigit() or len(value) > 10:
+        raise BadCallbackData(value)
+    number = int(value)
+    if number < 1:
+        raise BadCallbackData(value)
+    return number
+
+
+def one_of(choices) -> Callable[[str], str]:
+    """Faqat ruxsat etilgan qiymatlardan birini qabul qiluvchi parser"""
+    allowed = frozenset(choices)
+
+    def parse(value: str) -> str:
+        if value not in allowed:
+            raise BadCallbackData(value)
+        return value
+
+    return parse
+
+
+# ==================== ROUTE ====================
+class Route:
+    """
+    Bitta callback yo'nalishi
+
+    Args:
+        key: Aniq qiymat ("show_help") yoki prefiks ("eps_")
+        handler: async handler(update, context, *args)
+        parsers: Prefiksdan keyingi "_" bilan ajratilgan argumentlar parserlari
+        answer: Handler dan oldin query.answer() chaqirilsinmi
+        check: Qo'shimcha async tekshiruv (masalan admin) - False bo'lsa rad etiladi
+    """
+
+    __slots__ = ("key", "handler", "parsers", "answer", "check",
+                 "calls", "rejected", "total_time", "max_time")
+
+    def __init__(self, key: str, handler: Callable, parsers: Sequence[Callable] = (),
+                 answer: bool = True, check: Optional[Callable] = None):
+        self.key = key
+        self.handler = handler
+        self.parsers = tuple(parsers)
+        self.answer = answer
+        self.check = check
+        self.calls = 0
+        self.rejected = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def parse(self, tail: str) -> tuple:
+        """Prefiksdan keyingi qismni typed argumentlarga aylantirish"""
+        if not self.parsers:
+            if tail:
+                raise BadCallbackData(tail)
+            return ()
+
+        values = tail.split("_", len(self.parsers) - 1)
+        if len(values) != len(self.parsers):
+            raise BadCallbackData(tail)
+        return tuple(parse(value) for parse, value in zip(self.parsers, values))
+
+    def record(self, elapsed: float):
+        self.calls += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+
+# ==================== ROUTER ====================
+class CallbackRouter:
+    """
+    Callback data -> handler jadvali
+
+    Aniq qiymatlar dict da (O(1)), prefikslar belgilar trie sida saqlanadi:
+    qidiruv callback uzunligiga bog'liq (<= 64 belgi), yo'nalishlar soniga
+    emas. Eng uzun mos prefiks tanlanadi, shuning uchun "part_" va
+    "parts_" yoki "cat_" va "catpage_" bir-biriga xalaqit bermaydi.
+
+    Args:
+        slow_ms: Shundan sekin ishlagan handlerlar logga yoziladi
+    """
+
+    def __init__(self, slow_ms: float = 1000):
+        self.slow_ms = slow_ms
+        self.exact = {}
+        self.trie = {}
+        self.routes = []
+
+    def exact_route(self, key: str, handler: Callable, **kwargs) -> Route:
+        """Aniq callback qiymati uchun yo'nalish"""
+        route = Route(key, handler, **kwargs)
+        self.exact[key] = route
+        self.routes.append(route)
+        return route
+
+    def prefix_route(self, prefix: str, handler: Callable, parsers: Sequence[Callable] = (), **kwargs) -> Route:
+        """Prefiks + argumentlar uchun yo'nalish ("eps_<code>_<page>")"""
+        route = Route(prefix, handler, parsers, **kwargs)
+        node = self.trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = route
+        self.routes.append(route)
+        return route
+
+    def resolve(self, data: str) -> Tuple[Optional[Route], tuple]:
+        """
+        Callback data ni yo'nalish va argumentlarga ajratish
+
+        Raises:
+            BadCallbackData: Prefiks topildi, lekin argumentlar noto'g'ri
+        """
+        if not data or len(data) > MAX_CALLBACK_LENGTH:
+            return None, ()
+
+        route = self.exact.get(data)
+        if route:
+            return route, ()
+
+        match, end = None, 0
+        node = self.trie
+        for i, char in enumerate(data):
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                match, end = node[None], i + 1
+
+        if match is None:
+            return None, ()
+
+        try:
+            return match, match.parse(data[end:])
+        except (BadCallbackData, ValueError):
+            match.rejected += 1
+            raise BadCallbackData(data)
+
+    def pattern(self) -> re.Pattern:
+        """CallbackQueryHandler uchun regex - faqat ro'yxatdagi callbacklar"""
+        exact = "|".join(re.escape(key) + "$" for key in self.exact)
+        prefixes = "|".join(re.escape(route.key) for route in self.routes if route.key not in self.exact)
+        return re.compile(f"^(?:{exact}|{prefixes})")
+
+    async def dispatch(self, route: Route, update, context, args: tuple):
+        """Handler ni chaqirish va vaqtini o'lchash"""
+        started = time.perf_counter()
+        try:
+            await route.handler(update, context, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            route.record(elapsed)
+            if elapsed * 1000 > self.slow_ms:
+                logger.warning(f"🐢 Sekin callback {route.key}: {elapsed * 1000:.0f} ms")
+
+    def timings(self) -> list:
+        """Yo'nalishlar statistikasi (eng ko'p chaqirilganlari birinchi)"""
+        return sorted(
+            (
+                {
+                    'route': route.key,
+                    'calls': route.calls,
+                    'rejected': route.rejected,
+                    'avg_ms': round(route.total_time / route.calls * 1000, 1) if route.calls else 0.0,
+                    'max_ms': round(route.max_time * 1000, 1)
+                }
+                for route in self.routes
+            ),
+            key=lambda item: item['calls'],
+            reverse=True
+        )
@@ -0,0 +1,50 @@
+import re
+from typing import List
+
+# O'zbek kirill -> lotin transliteratsiyasi
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'j', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'x', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '',
+    'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya', 'ў': 'o', 'қ': 'q',
+    'ғ': 'g', 'ҳ': 'h',
+}
+
+# o‘, oʻ, o', g` kabi barcha apostrof variantlari
+APOSTROPHES = "'`´ʻʼ‘’"
+
+_TRANSLATE = str.maketrans({
+    **{ch: lat for ch, lat in CYRILLIC_TO_LATIN.items()},
+    **{ch: '' for ch in APOSTROPHES},
+})
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(text: str) -> str:
+    """
+    Kino nomini qidiruv uchun normallashtirish
+
+    Kirill harflari lotinga o'giriladi, apostroflar olib tashlanadi,
+    harf-raqam bo'lmagan belgilar bitta bo'shliqqa aylantiriladi.
+    Shu sababli "O'tkan kunlar", "Oʻtkan kunlar" va "Ўткан кунлар"
+    bir xil ko'rinishga keladi. Imlosi farq qiladigan so'zlar
+    (masalan, "Ўтган") birlashtirilmaydi - ular trigram o'xshashlik
+    bilan topiladi.
+
+    Args:
+        text: Asl nom yoki qidiruv so'rovi
+
+    Returns:
+        str: Normallashtirilgan matn (masalan: "otkan kunlar")
+    """
+    if not text:
+        return ""
+
+    text = text.lower().translate(_TRANSLATE)
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def split_terms(text: str) -> List[str]:
+    """Normallashtirilgan so'rovni so'zlarga bo'lish"""
+    return [t for t in normalize_name(text).split(" ") if t]
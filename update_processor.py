@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Awaitable, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def update_chat_key(update: object) -> Optional[int]:
+    """Update qaysi chat/foydalanuvchiga tegishli (ketma-ketlik kaliti)"""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return None
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Parallel update qayta ishlash, lekin har bir chat ichida ketma-ket
+
+    Turli foydalanuvchilarning update lari bir vaqtda (ko'pi bilan
+    `max_concurrent_updates` ta) ishlaydi, shuning uchun bitta sekin
+    send_video boshqalarni kutdirmaydi. Bitta chatning update lari esa
+    kelgan tartibda, birin-ketin bajariladi - ConversationHandler holati
+    (add_movie_conv) va user_data poyga holatidan himoyalangan.
+
+    Chat navbatini kutayotgan update umumiy limitdan joy egallamaydi:
+    avval chat qulfi, keyin semafor olinadi.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._chat_locks = {}  # chat_id -> [Lock, kutayotganlar soni]
+
+    async def process_update(self, update: object, coroutine: Awaitable) -> None:
+        key = update_chat_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        entry = self._chat_locks.get(key)
+        if entry is None:
+            entry = self._chat_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+
+        try:
+            async with entry[0]:
+                await super().process_update(update, coroutine)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                # Kutayotgan update qolmadi - qulf xotirada saqlanmaydi
+                del self._chat_locks[key]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        if self._chat_locks:
+            logger.info(f"⏳ {len(self._chat_locks)} ta chat update lari tugallanmoqda")
@@ -0,0 +1,137 @@
+import hmac
+import json
+import logging
+import time
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from telegram import Bot, Update
+from telegram.ext import Application
+from config import (
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_LISTEN, WEBHOOK_PORT,
+    WEBHOOK_SECRET, WEBHOOK_MAX_CONNECTIONS
+)
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def create_web_app(enqueue, status, secret: str = WEBHOOK_SECRET,
+                   path: str = WEBHOOK_PATH) -> Starlette:
+    """
+    Webhook uchun ASGI ilova
+
+    POST {path} - Telegram update (secret token bilan)
+    GET /health - holat tekshiruvi (load balancer uchun)
+
+    Lokal test: yozib olingan update ni POST qilish kifoya:
+        curl -X POST localhost:8443/telegram \\
+             -H "X-Telegram-Bot-Api-Secret-Token: $WEBHOOK_SECRET" \\
+             -H "Content-Type: application/json" -d @update.json
+
+    Args:
+        enqueue: async enqueue(data: dict) - update ni qayta ishlashga berish
+        status: status() -> dict - /health javobiga qo'shiladigan ma'lumot
+    """
+    started_at = time.monotonic()
+    counters = {'received': 0, 'rejected': 0}
+
+    async def telegram(request: Request) -> Response:
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), secret.encode()):
+            counters['rejected'] += 1
+            return Response(status_code=403)
+
+        try:
+            data = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            data = None
+
+        if not isinstance(data, dict) or "update_id" not in data:
+            counters['rejected'] += 1
+            return Response(status_code=400)
+
+        counters['received'] += 1
+        # Javob darhol qaytariladi - update navbatdan qayta ishlanadi
+        await enqueue(data)
+        return Response(status_code=200)
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({
+            'uptime': round(time.monotonic() - started_at),
+            **counters,
+            **status()
+        })
+
+    return Starlette(routes=[
+        Route(path, telegram, methods=["POST"]),
+        Route("/health", health, methods=["GET"]),
+    ])
+
+
+def create_server(web_app: Starlette) -> uvicorn.Server:
+    return uvicorn.Server(uvicorn.Config(
+        app=web_app,
+        host=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        use_colors=False,
+        log_level="warning"
+    ))
+
+
+async def set_webhook(bot: Bot) -> None:
+    """Telegram ga webhook manzilini ro'yxatdan o'tkazish (WEBHOOK_URL bo'lsa)"""
+    if not WEBHOOK_URL:
+        logger.warning("⚠️ WEBHOOK_URL yo'q - faqat lokal update lar qabul qilinadi")
+        return
+
+    await bot.set_webhook(
+        url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=Update.ALL_TYPES
+    )
+    logger.info(f"🌐 Webhook o'rnatildi: {WEBHOOK_URL}{WEBHOOK_PATH}")
+
+
+async def run_webhook(application: Application) -> None:
+    """
+    Botni webhook rejimida ishga tushirish (run_polling o'rniga)
+
+    PTB faqat update larni qayta ishlaydi, HTTP qabul qilish uvicorn da.
+    post_init/post_stop/post_shutdown run_polling dagidek chaqiriladi.
+    """
+    async def enqueue(data: dict):
+        try:
+            update = Update.de_json(data, application.bot)
+        except (TypeError, KeyError, ValueError) as e:
+            logger.warning(f"⚠️ Noto'g'ri update: {e}")
+            return
+        await application.update_queue.put(update)
+
+    def status() -> dict:
+        return {
+            'status': "ok" if application.running else "starting",
+            'update_queue': application.update_queue.qsize()
+        }
+
+    server = create_server(create_web_app(enqueue, status))
+
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+
+        await set_webhook(application.bot)
+        await application.start()
+        logger.info(f"✅ Webhook server: {WEBHOOK_LISTEN}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        try:
+            await server.serve()
+        finally:
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+            if application.post_shutdown:
+                await application.post_shutdown(application)
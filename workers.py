@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+from telegram import Bot, Update
+from telegram.error import NetworkError, RetryAfter, TimedOut
+from config import BOT_TOKEN, BOT_MODE
+
+logger = logging.getLogger(__name__)
+
+# Worker ni to'xtatish signali (navbatga qo'yiladi)
+STOP = None
+
+# Ingress ni to'xtatadigan OS signallari (Ctrl+C, docker stop / systemd)
+STOP_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+# ==================== SHARDING ====================
+def shard_key(data: dict) -> int:
+    """
+    Update dan foydalanuvchi/chat ID ni topish (de_json siz)
+
+    Bir foydalanuvchining barcha update lari bitta worker ga tushishi
+    kerak - ConversationHandler holati (add_movie_conv) va update
+    tartibi shunga bog'liq. Avval `from` (foydalanuvchi), keyin chat,
+    hech biri bo'lmasa update_id ishlatiladi.
+    """
+    for value in data.values():
+        if not isinstance(value, dict):
+            continue
+
+        user = value.get("from") or value.get("user")
+        if user:
+            return user["id"]
+
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+
+    return data.get("update_id", 0)
+
+
+class ShardedDispatcher:
+    """
+    Update larni worker navbatlariga taqsimlash (shard_key % N)
+
+    Navbat sifatida multiprocessing.Queue yoki oddiy queue.Queue berish
+    mumkin - lokal testda worker jarayonlarisiz tekshiriladi.
+    """
+
+    def __init__(self, queues: list):
+        self.queues = queues
+        self.dispatched = [0] * len(queues)
+
+    def shard(self, data: dict) -> int:
+        return shard_key(data) % len(self.queues)
+
+    def put(self, data: dict) -> int:
+        """Update ni tegishli worker ga berish, worker raqamini qaytaradi"""
+        index = self.shard(data)
+        self.queues[index].put(data)
+        self.dispatched[index] += 1
+        return index
+
+    def stop(self):
+        for queue in self.queues:
+            queue.put(STOP)
+
+    def status(self) -> dict:
+        return {'status': "ok", 'workers': len(self.queues), 'dispatched': list(self.dispatched)}
+
+
+# ==================== WORKER ====================
+async def _serve_worker(index: int, queue, build_application) -> None:
+    application = build_application(worker=index)
+    loop = asyncio.get_running_loop()
+
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        logger.info(f"👷 Worker #{index} ishga tushdi")
+
+        try:
+            while True:
+                # Bloklovchi get() alohida thread da - event loop ishlashda davom etadi
+                data = await loop.run_in_executor(None, queue.get)
+                if data is STOP:
+                    break
+                try:
+                    update = Update.de_json(data, application.bot)
+                except (TypeError, KeyError, ValueError) as e:
+                    logger.warning(f"⚠️ Worker #{index}: noto'g'ri update: {e}")
+                    continue
+                await application.update_queue.put(update)
+        finally:
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+            if application.post_shutdown:
+                await application.post_shutdown(application)
+            logger.info(f"👷 Worker #{index} to'xtadi")
+
+
+def run_worker(index: int, queue, build_application) -> None:
+    """Worker jarayoni: o'z Application i bilan navbatdagi update larni qayta ishlaydi"""
+    # Signallarni faqat asosiy jarayon ushlaydi, worker STOP orqali to'xtaydi
+    for signum in STOP_SIGNALS:
+        signal.signal(signum, signal.SIG_IGN)
+    asyncio.run(_serve_worker(index, queue, build_application))
+
+
+# ==================== INGRESS ====================
+async def poll_ingress(dispatcher: ShardedDispatcher, timeout: int = 30) -> None:
+    """Long polling orqali update larni olib worker larga taqsimlash"""
+    offset = 0
+
+    async with Bot(BOT_TOKEN) as bot:
+        await bot.delete_webhook()
+
+        while True:
+            try:
+                updates = await bot.get_updates(
+                    offset=offset,
+                    timeout=timeout,
+                    allowed_updates=Update.ALL_TYPES,
+                    read_timeout=timeout + 10
+                )
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except (TimedOut, NetworkError) as e:
+                logger.warning(f"⚠️ getUpdates xatosi: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            for update in updates:
+                dispatcher.put(update.to_dict())
+                offset = update.update_id + 1
+
+
+async def webhook_ingress(dispatcher: ShardedDispatcher) -> None:
+    """Webhook orqali update larni qabul qilib worker larga taqsimlash"""
+    from webhook import create_web_app, create_server, set_webhook  # starlette/uvicorn faqat shu rejimda kerak
+
+    async def enqueue(data: dict):
+        dispatcher.put(data)
+
+    async with Bot(BOT_TOKEN) as bot:
+        await set_webhook(bot)
+
+    await create_server(create_web_app(enqueue, dispatcher.status)).serve()
+
+
+async def run_ingress(ingress, dispatcher: ShardedDispatcher) -> None:
+    """
+    Ingress ni SIGINT/SIGTERM gacha ishlatish
+
+    Signal kelganda ingress bekor qilinadi va shu funksiya oddiy
+    qaytadi - worker larni to'xtatish chaqiruvchida (run_sharded).
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(ingress(dispatcher))
+
+    def on_signal(signum: int):
+        logger.info(f"🛑 {signal.Signals(signum).name} qabul qilindi, to'xtatilmoqda...")
+        task.cancel()
+
+    for signum in STOP_SIGNALS:
+        try:
+            loop.add_signal_handler(signum, on_signal, signum)
+        except NotImplementedError:
+            # Windows - Ctrl+C KeyboardInterrupt orqali ushlanadi
+            pass
+
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        for signum in STOP_SIGNALS:
+            try:
+                loop.remove_signal_handler(signum)
+            except NotImplementedError:
+                pass
+
+
+def run_sharded(build_application, workers: int) -> None:
+    """
+    Ko'p jarayonli rejim: bitta ingress + `workers` ta worker jarayoni
+
+    Har bir worker to'liq handler stekini o'z Application ida ishlatadi.
+    Update lar foydalanuvchi ID bo'yicha taqsimlanadi, shuning uchun
+    bitta foydalanuvchining update lari tartibi saqlanadi.
+    Tugallanmagan broadcast lar faqat 0-worker da davom ettiriladi.
+    Keshlar har jarayonda alohida - ular bazadagi versiya orqali
+    moslanadi (sync.cache_sync_job).
+    SIGINT/SIGTERM ni faqat shu jarayon ushlaydi: ingress to'xtaydi,
+    har bir worker ga STOP yuboriladi va ular yakunlanishi kutiladi.
+    """
+    # spawn - har bir worker o'z DB ulanishlari va keshlari bilan boshlanadi
+    context = multiprocessing.get_context("spawn")
+    queues = [context.Queue() for _ in range(workers)]
+    processes = [
+        context.Process(target=run_worker, args=(i, queue, build_application), name=f"worker-{i}")
+        for i, queue in enumerate(queues)
+    ]
+    for process in processes:
+        process.start()
+
+    dispatcher = ShardedDispatcher(queues)
+    ingress = webhook_ingress if BOT_MODE == "webhook" else poll_ingress
+    logger.info(f"✅ Ingress ({BOT_MODE}) + {workers} ta worker ishga tushdi")
+
+    try:
+        asyncio.run(run_ingress(ingress, dispatcher))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dispatcher.stop()
+        for process in processes:
+            process.join()
+        logger.info(f"🛑 Barcha worker lar to'xtadi: {dispatcher.dispatched}")